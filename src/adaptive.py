@@ -0,0 +1,183 @@
+"""
+自适应难度引擎
+
+按键统计: 每个键和每个相邻键对 (bigram) 维护指数衰减的准确率和反应时间，每次按键 O(1) 更新。
+选词: 每个关卡的 items 预先构建别名表 (Vose alias method)，按词中弱键的程度加权，抽样 O(1)；
+只有弱项变化超过阈值时，才把包含相关键的关卡标记为需要重建，并在下次生成时重建。
+速度: 根据整体准确率调整下落速度和生成间隔，含弱键的词下落得更慢，留出练习时间。
+"""
+import random
+
+PRIOR_ACCURACY = 0.9
+REACTION_GAP_LIMIT = 2.0  # 超过这个间隔的按键不计入反应时间
+REBUILD_THRESHOLD = 0.05  # 弱项变化超过这个值才重建相关关卡的抽样表
+CORPUS_CANDIDATES = 8  # 词库关卡每次生成时比较的候选词数
+SPEED_STEP = 0.1  # 速度系数的量化步长；TargetIndex 按速度分组，连续取值会让每个对象自成一组
+
+
+class KeyStat:
+    """单个键或键对的衰减统计"""
+    __slots__ = ('accuracy', 'reaction', 'count')
+
+    def __init__(self):
+        self.accuracy = PRIOR_ACCURACY
+        self.reaction = None
+        self.count = 0
+
+    def update(self, hit, reaction, decay):
+        self.accuracy += decay * ((1.0 if hit else 0.0) - self.accuracy)
+        if reaction is not None:
+            self.reaction = reaction if self.reaction is None else self.reaction + decay * (reaction - self.reaction)
+        self.count += 1
+
+
+class AliasTable:
+    """Vose 别名表：构建 O(n)，按权重抽样 O(1)"""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng=random):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class AdaptiveEngine:
+    """根据玩家的弱键调整选词和速度"""
+
+    def __init__(self, levels, decay=0.1, bias=4.0):
+        self.decay = decay
+        self.bias = bias  # 弱项对选词权重的放大系数
+        self.keys = {}
+        self.bigrams = {}
+        self.overall = KeyStat()
+        self.last_char = None
+        self.last_time = None
+
+        # 每个键/键对出现在哪些关卡的 items 中，用于增量重建
+        self.levels = {}
+        self.key_levels = {}
+        self.bigram_levels = {}
+        self.snapshot = {}  # 构建抽样表时使用的弱项值
+        self.tables = {}
+        self.dirty = set()
+        self.rebuilds = 0
+        for settings in levels:
+            self._register(settings['level'], settings['items'])
+
+    def _register(self, level, items):
+        self.levels[level] = items
+        for item in items:
+            item = item.upper()
+            for ch in item:
+                self.key_levels.setdefault(ch, set()).add(level)
+            for pair in zip(item, item[1:]):
+                self.bigram_levels.setdefault(pair, set()).add(level)
+        self.dirty.add(level)
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+    def record(self, char, hit, timestamp):
+        """记录一次按键，O(1)"""
+        char = char.upper()
+        reaction = None
+        if self.last_time is not None and 0 < timestamp - self.last_time <= REACTION_GAP_LIMIT:
+            reaction = timestamp - self.last_time
+
+        stat = self.keys.get(char)
+        if stat is None:
+            stat = self.keys[char] = KeyStat()
+        stat.update(hit, reaction, self.decay)
+        self.overall.update(hit, reaction, self.decay)
+        self._refresh(char, self.key_weakness(char), self.key_levels)
+
+        if self.last_char is not None and reaction is not None:
+            pair = (self.last_char, char)
+            pair_stat = self.bigrams.get(pair)
+            if pair_stat is None:
+                pair_stat = self.bigrams[pair] = KeyStat()
+            pair_stat.update(hit, reaction, self.decay)
+            self._refresh(pair, self._weakness(pair_stat), self.bigram_levels)
+
+        self.last_char = char
+        self.last_time = timestamp
+
+    def _refresh(self, key, weakness, key_levels):
+        if abs(weakness - self.snapshot.get(key, 0.0)) > REBUILD_THRESHOLD:
+            self.snapshot[key] = weakness
+            self.dirty.update(key_levels.get(key, ()))
+
+    def _weakness(self, stat):
+        """0 表示没有问题；准确率越低、反应越慢于平均水平，数值越大"""
+        if stat is None:
+            return 0.0
+        weakness = 1.0 - stat.accuracy
+        if stat.reaction is not None and self.overall.reaction:
+            weakness += 0.5 * max(0.0, stat.reaction / self.overall.reaction - 1.0)
+        return weakness
+
+    def key_weakness(self, char):
+        return self._weakness(self.keys.get(char))
+
+    def word_weakness(self, text, use_snapshot=False):
+        lookup = self.snapshot.get if use_snapshot else None
+        total = 0.0
+        for ch in text:
+            total += lookup(ch, 0.0) if lookup else self.key_weakness(ch)
+        for pair in zip(text, text[1:]):
+            total += lookup(pair, 0.0) if lookup else self._weakness(self.bigrams.get(pair))
+        return total / len(text)
+
+    # ------------------------------------------------------------------
+    # 选词与速度
+    # ------------------------------------------------------------------
+    def _weight(self, text, use_snapshot=False):
+        return 1.0 + self.bias * self.word_weakness(text.upper(), use_snapshot)
+
+    def _table(self, level_settings):
+        level = level_settings['level']
+        if self.levels.get(level) is not level_settings['items']:
+            self._register(level, level_settings['items'])
+        if level in self.dirty:
+            items = self.levels[level]
+            self.tables[level] = AliasTable([self._weight(item, use_snapshot=True) for item in items])
+            self.dirty.discard(level)
+            self.rebuilds += 1
+        return self.tables[level]
+
+    def choose_item(self, level_settings, rng=random, sample_word=None):
+        """选取下一个生成的文本；sample_word 提供时 (词库关卡) 从若干候选中按弱项加权挑选"""
+        if sample_word is not None:
+            candidates = [sample_word() for _ in range(CORPUS_CANDIDATES)]
+            return rng.choices(candidates, weights=[self._weight(c) for c in candidates])[0]
+        items = level_settings['items']
+        return items[self._table(level_settings).sample(rng)]
+
+    def skill_factor(self):
+        """整体水平系数，约 0.75 (吃力) 到 1.25 (游刃有余)"""
+        factor = 1.0 + 2.5 * (self.overall.accuracy - PRIOR_ACCURACY)
+        return min(1.25, max(0.75, factor))
+
+    def speed_factor(self, text):
+        """下落速度系数：整体越好越快，含弱键的词越慢"""
+        slowdown = min(0.3, 0.3 * self.word_weakness(text.upper()))
+        return round(self.skill_factor() * (1.0 - slowdown) / SPEED_STEP) * SPEED_STEP
+
+    def interval_factor(self):
+        """生成间隔系数：整体越好间隔越短"""
+        return 1.0 / self.skill_factor()
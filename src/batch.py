@@ -0,0 +1,198 @@
+"""
+并行批量模拟，用于调整 difficulty_levels
+
+在进程池中运行大量无界面对局，每局由一个模拟打字员 (速度、错误率、反应时间可配置) 来玩。
+对速度、生成间隔、升级分数三个参数的缩放系数以及打字员参数做网格扫描，
+按网格点汇总坚持时间 (城堡核心被毁的时刻)、到达关卡和得分的分布。
+
+工作进程在启动时导入游戏并加载字体，之后一直复用，初始化只付出一次。
+同一网格点的第 i 局在所有网格点上使用相同的种子，便于比较不同参数。
+
+用法:
+    python batch.py --runs 200 --duration 600 --wpm 30 50 70 --speed-scale 0.8 1.0 1.2
+    python batch.py --runs 500 --interval-scale 0.9 1.1 --scale-levels 6 7 8 --output report.json
+"""
+import argparse
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import string
+import time
+
+import numpy as np
+
+import headless  # 设置 SDL 的 dummy 驱动后导入游戏
+import typing_game as tg
+
+WRONG_KEYS = string.ascii_uppercase + tg.TYPABLE_SYMBOLS
+
+
+class SyntheticTypist:
+    """简单的打字员模型
+
+    每次选中一个新单词前停顿一个反应时间，之后按 WPM 对应的间隔逐字输入 (每词按 5 个字符计)，
+    间隔带随机抖动；每次按键以 error_rate 的概率按错。优先处理最靠近城堡的对象。
+    """
+
+    def __init__(self, wpm=40.0, error_rate=0.05, reaction_time=0.4, seed=0):
+        self.interval = 12.0 / wpm  # 60 秒 / (wpm * 5 字符)
+        self.error_rate = error_rate
+        self.reaction_time = reaction_time
+        self.rng = random.Random(seed)
+        self.target = None
+        self.next_time = 0.0
+
+    def _jitter(self, mean):
+        return max(0.3 * mean, self.rng.gauss(mean, 0.2 * mean))
+
+    def poll(self, game_state, now):
+        """返回这一步要按下的字符，没有则返回 None"""
+        if now < self.next_time:
+            return None
+        current = game_state['current_target']
+        if current is not None and current is not self.target:
+            self.target = current  # 按错键时游戏可能锁定了另一个对象
+        if self.target is None or not self.target.active:
+            self.target = max((obj for obj in game_state['falling_objects'] if obj.active),
+                              key=lambda obj: obj.pixel_y_float, default=None)
+            if self.target is not None:
+                self.next_time = now + self._jitter(self.reaction_time)
+            return None
+
+        char = self.target.text[self.target.progress]
+        if self.rng.random() < self.error_rate:
+            char = self.rng.choice(WRONG_KEYS.replace(char, ''))
+        self.next_time = now + self._jitter(self.interval)
+        return char
+
+
+def scaled_levels(speed_scale=1.0, interval_scale=1.0, threshold_scale=1.0, only_levels=None):
+    """按系数缩放 difficulty_levels 的副本，only_levels 给出时只缩放这些关卡"""
+    levels = []
+    for settings in tg.difficulty_levels:
+        settings = dict(settings)
+        if not only_levels or settings['level'] in only_levels:
+            settings['speed_grid_per_sec'] *= speed_scale
+            settings['generate_interval'] *= interval_scale
+            settings['score_threshold'] = round(settings['score_threshold'] * threshold_scale)
+        levels.append(settings)
+    return levels
+
+
+def init_worker(corpus_path=None):
+    """工作进程初始化：加载字体 (决定字符尺寸) 和词库，之后的每局都复用"""
+    tg.app.init_font()
+    if corpus_path:
+        tg.load_corpus(corpus_path)
+
+
+def run_job(job):
+    """在工作进程中运行一局，返回 (网格点序号, 结果)"""
+    params = job['params']
+    levels = scaled_levels(params['speed_scale'], params['interval_scale'], params['threshold_scale'],
+                           job['only_levels'])
+    typist = SyntheticTypist(params['wpm'], params['error_rate'], params['reaction_time'], seed=job['seed'])
+    report = headless.simulate(seed=job['seed'], duration=job['duration'], step=job['step'],
+                               adaptive_difficulty=job['adaptive'], levels=levels, typist=typist)
+    return job['point'], {key: report[key] for key in ('time_to_failure', 'level', 'score', 'killed', 'spawned')}
+
+
+def percentiles(values, qs=(10, 50, 90)):
+    if not len(values):
+        return None
+    return {f'p{q}': round(float(v), 3) for q, v in zip(qs, np.percentile(values, qs))}
+
+
+def summarize(params, results, duration):
+    failures = np.array([r['time_to_failure'] for r in results if r['time_to_failure'] is not None])
+    levels = np.array([r['level'] for r in results])
+    scores = np.array([r['score'] for r in results])
+    reached, counts = np.unique(levels, return_counts=True)
+    return {
+        'params': params,
+        'runs': len(results),
+        'failure_rate': round(len(failures) / len(results), 4),
+        # 未失败的对局在 duration 处截断
+        'time_to_failure': percentiles(failures),
+        'survival_time_mean': round(float(np.mean([r['time_to_failure'] or duration for r in results])), 3),
+        'level': {'mean': round(float(levels.mean()), 3),
+                  'histogram': {int(level): int(n) for level, n in zip(reached, counts)}},
+        'score': {'mean': round(float(scores.mean()), 1), **percentiles(scores)},
+    }
+
+
+def build_grid(args):
+    axes = {
+        'speed_scale': args.speed_scale,
+        'interval_scale': args.interval_scale,
+        'threshold_scale': args.threshold_scale,
+        'wpm': args.wpm,
+        'error_rate': args.error_rate,
+        'reaction_time': args.reaction,
+    }
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def run_batch(grid, runs, duration=600.0, step=1 / 60, seed=0, workers=None, corpus_path=None,
+              adaptive_difficulty=False, only_levels=None):
+    """对网格中的每个参数组合运行 runs 局，返回 (汇总列表, 总耗时秒数)"""
+    jobs = [{'point': point, 'params': params, 'seed': seed + i, 'duration': duration, 'step': step,
+             'adaptive': adaptive_difficulty, 'only_levels': only_levels}
+            for point, params in enumerate(grid) for i in range(runs)]
+    workers = workers or os.cpu_count() or 1
+    results = [[] for _ in grid]
+    start = time.perf_counter()
+    # 每个进程初始化一次后分批处理任务
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=init_worker, initargs=(corpus_path,)) as pool:
+        chunksize = max(1, len(jobs) // (workers * 8))
+        for point, result in pool.map(run_job, jobs, chunksize=chunksize):
+            results[point].append(result)
+    elapsed = time.perf_counter() - start
+    return [summarize(params, point_results, duration) for params, point_results in zip(grid, results)], elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typing Defender 并行批量模拟")
+    parser.add_argument("--runs", type=int, default=100, help="每个网格点的对局数")
+    parser.add_argument("--duration", type=float, default=600.0, help="每局最长模拟时长 (秒)")
+    parser.add_argument("--step", type=float, default=1 / 60, help="固定时间步长 (秒)")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子，之后依次加一")
+    parser.add_argument("--workers", type=int, help="工作进程数，默认为 CPU 核数")
+    parser.add_argument("--speed-scale", type=float, nargs="+", default=[1.0], help="speed_grid_per_sec 的缩放系数")
+    parser.add_argument("--interval-scale", type=float, nargs="+", default=[1.0], help="generate_interval 的缩放系数")
+    parser.add_argument("--threshold-scale", type=float, nargs="+", default=[1.0], help="score_threshold 的缩放系数")
+    parser.add_argument("--scale-levels", type=int, nargs="+", help="只缩放这些关卡，默认全部")
+    parser.add_argument("--wpm", type=float, nargs="+", default=[40.0], help="打字员每分钟词数")
+    parser.add_argument("--error-rate", type=float, nargs="+", default=[0.05], help="打字员每次按键的出错概率")
+    parser.add_argument("--reaction", type=float, nargs="+", default=[0.4], help="打字员选中新单词前的反应时间 (秒)")
+    parser.add_argument("--corpus", metavar="PATH", help="每行一个单词的词库文件，用于单词关卡")
+    parser.add_argument("--adaptive", action="store_true", help="开启自适应难度")
+    parser.add_argument("--output", metavar="PATH", help="把完整报告写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    grid = build_grid(args)
+    summaries, elapsed = run_batch(grid, args.runs, args.duration, args.step, args.seed, args.workers,
+                                   args.corpus, args.adaptive, args.scale_levels)
+    total = len(grid) * args.runs
+    report = {'runs': total, 'duration': args.duration, 'step': args.step, 'wall_seconds': round(elapsed, 3),
+              'simulations_per_second': round(total / elapsed, 2), 'points': summaries}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{total} simulations in {elapsed:.1f}s ({total / elapsed:.1f}/s)")
+    for summary in summaries:
+        params = "  ".join(f"{k}={v:g}" for k, v in summary['params'].items())
+        ttf = summary['time_to_failure']
+        ttf_text = f"ttf p50={ttf['p50']:.0f}s" if ttf else "no failures"
+        print(f"{params}\n    fail={summary['failure_rate']:.0%}  {ttf_text}  "
+              f"level={summary['level']['mean']:.1f}  score p50={summary['score']['p50']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
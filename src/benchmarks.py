@@ -0,0 +1,366 @@
+"""
+Typing Defender 性能基准
+
+target_search 比较线性扫描与 TargetIndex。run 在离屏 (dummy 驱动) 下逐个测量热点路径，
+每项取多轮中的最短耗时 (微秒/次)，并与 JSON 基线比较：任一项比基线慢超过阈值时以非零状态退出。
+基线与机器相关，应在同一台机器上用 --save 生成后再比较。
+
+用法:
+    python benchmarks.py target_search
+    python benchmarks.py run --save                 # 生成或更新基线
+    python benchmarks.py run --threshold 0.15       # 与基线比较
+    python benchmarks.py run --only castle frame    # 只运行部分分组
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import typing_game as tg  # noqa: E402  (隐藏 pygame 欢迎信息的变量需在导入前设置)
+
+SEARCH_CHARS = "FGHJRTYUBNMDKIEC,SLWO.AZX;P"
+
+
+def linear_find_target(falling_objects, typed_char):
+    """原先 KEYDOWN 处理中的线性扫描，作为对照组"""
+    best_match = None
+    for obj in falling_objects:
+        if obj.active and obj.text.startswith(typed_char.upper()):
+            if not best_match or obj.pixel_y_float > best_match.pixel_y_float:
+                best_match = obj
+    return best_match
+
+
+def make_falling_objects(count, seed=0, max_y=None):
+    """按生成顺序构造 count 个对象，位置与真实游戏中同速对象的排列一致
+
+    max_y 给出时把位置按比例压缩到 [0, max_y] 内，早生成的对象仍在更低处
+    """
+    tg.app.init_font()
+    tg.seed_rng(seed)
+    r = random.Random(seed)
+    items = [item for level in tg.difficulty_levels for item in level['items']]
+    speeds = [level['speed_grid_per_sec'] for level in tg.difficulty_levels]
+    objects = []
+    index = tg.TargetIndex()
+    for i in range(count):
+        is_bonus = r.random() < 0.1
+        speed = r.choice(speeds) * (2.0 if is_bonus else 1.0)
+        obj = tg.FallingObject(r.choice(items), speed, is_bonus, i + 1)
+        # 越早生成的对象下落时间越长
+        obj.pixel_y_float = obj.speed_pixel_per_sec * (count - i) * 0.01
+        if max_y is not None:
+            obj.pixel_y_float = max_y * (count - i) / count
+        objects.append(obj)
+        index.add(obj)
+    return objects, index
+
+
+def bench_target_search(counts=(10, 100, 1000), repeat=5, number=200):
+    """比较线性扫描与 TargetIndex 在不同活动对象数量下的查找耗时"""
+    results = []
+    for count in counts:
+        objects, index = make_falling_objects(count)
+        for ch in SEARCH_CHARS:
+            assert linear_find_target(objects, ch) is index.lowest(ch)
+
+        def run_linear():
+            for ch in SEARCH_CHARS:
+                linear_find_target(objects, ch)
+
+        def run_index():
+            for ch in SEARCH_CHARS:
+                index.lowest(ch)
+
+        per_lookup = number * len(SEARCH_CHARS)
+        linear_us = min(timeit.repeat(run_linear, repeat=repeat, number=number)) / per_lookup * 1e6
+        index_us = min(timeit.repeat(run_index, repeat=repeat, number=number)) / per_lookup * 1e6
+        results.append({'objects': count, 'linear_us': linear_us, 'index_us': index_us,
+                        'speedup': linear_us / index_us if index_us else float('inf')})
+    return results
+
+
+# ==============================================================================
+# 热点路径基准
+# ==============================================================================
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 0.25  # 比基线慢 25% 以上视为退化
+OBJECT_COUNTS = (10, 100, 1000)
+FRAME_STEP = 1 / 60
+
+
+def measure(stmt, setup=None, number=100, repeat=5):
+    """每次调用的耗时 (微秒)，取 repeat 轮中的最小值；setup 在每轮计时前执行"""
+    return min(timeit.repeat(stmt, setup=setup or (lambda: None), repeat=repeat, number=number)) / number * 1e6
+
+
+def prepare():
+    """离屏初始化并固定时钟和随机数，使每次运行的工作量一致"""
+    tg.app.init_font()
+    tg.app.init_display()
+    clock = tg.SimulationClock()
+    tg.set_clock(clock)
+    tg.seed_rng(0)
+    random.seed(0)
+    tg.particle_pool.clear()
+    return clock
+
+
+def pygame_surface():
+    return tg.pygame.Surface((tg.WINDOW_PIXEL_WIDTH, tg.WINDOW_PIXEL_HEIGHT))
+
+
+def bench_digital_rain(repeat):
+    surface = pygame_surface()
+    rain = tg.DigitalRain(tg.WINDOW_PIXEL_WIDTH, tg.WINDOW_PIXEL_HEIGHT, tg.CHAR_WIDTH, tg.CHAR_HEIGHT, tg.font,
+                          seed=0)
+    yield 'digital_rain.draw', measure(lambda: rain.draw(surface), number=200, repeat=repeat)
+
+
+def bench_text_glow(repeat):
+    surface = pygame_surface()
+    yield 'draw_text_glow', measure(lambda: tg.draw_text_glow(surface, "DEFENDER", (100, 100), tg.font),
+                                    number=1000, repeat=repeat)
+
+
+def bench_castle(repeat):
+    surface = pygame_surface()
+    renderer = tg.CastleRenderer(tg.font, tg.CHAR_WIDTH, tg.CHAR_HEIGHT)
+    castle = tg.Castle(tg.initial_castle_art, tg.core_position_grid)
+    top_y = castle.top_row * tg.CHAR_HEIGHT
+    renderer.draw(surface, castle, top_y)
+    yield 'castle.draw', measure(lambda: renderer.draw(surface, castle, top_y), number=200, repeat=repeat)
+
+    # 每次撞击后增量重绘；每轮换一座新城堡，撞击列的序列固定
+    r = random.Random(0)
+    columns = [r.randrange(castle.cols) for _ in range(50)]
+    state = {}
+
+    def setup():
+        state['castle'] = tg.Castle(tg.initial_castle_art, tg.core_position_grid)
+        state['columns'] = iter(columns)
+        renderer.draw(surface, state['castle'], top_y)
+
+    def impact():
+        column = next(state['columns'])
+        state['castle'].impact(column, column + 4)
+        renderer.draw(surface, state['castle'], top_y)
+
+    yield 'castle.impact+draw', measure(impact, setup, number=len(columns), repeat=repeat)
+
+
+def bench_explosions(repeat, count=20):
+    surface = pygame_surface()
+    clock = tg.game_clock
+    state = {}
+
+    def setup():
+        tg.particle_pool.clear()
+        random.seed(0)
+        state['explosions'] = [tg.Explosion(100 + i * 30, 300, tg.YELLOW) for i in range(count)]
+
+    def frame():
+        clock.advance(FRAME_STEP)
+        for explosion in state['explosions']:
+            explosion.update(FRAME_STEP)
+        tg.particle_pool.update(FRAME_STEP)
+        for explosion in state['explosions']:
+            explosion.draw(surface)
+        tg.particle_pool.draw(surface)
+
+    # 爆炸持续 0.5 秒，每轮正好覆盖一次完整的生命周期
+    yield f'explosion.update+draw[{count}]', measure(frame, setup, number=30, repeat=repeat)
+    tg.particle_pool.clear()
+
+
+def bench_falling_object(repeat):
+    obj = tg.FallingObject("ALPHA", 1.0)
+    yield 'falling_object.move', measure(lambda: obj.move(FRAME_STEP), number=10000, repeat=repeat)
+
+    def type_word():
+        for char in obj.text:
+            obj.handle_input(char)
+        obj.active = True
+        obj.progress = 0
+
+    yield 'falling_object.handle_input', measure(type_word, number=2000, repeat=repeat) / len(obj.text)
+
+
+def bench_object_store(repeat, counts=OBJECT_COUNTS):
+    for count in counts:
+        state = {}
+
+        def setup(count=count):
+            state['store'] = store = tg.FallingObjectStore()
+            for obj in make_falling_objects(count, max_y=tg.WINDOW_PIXEL_HEIGHT / 2)[0]:
+                store.append(obj)
+
+        yield f'falling_objects.move[{count}]', measure(lambda: state['store'].move(FRAME_STEP), setup, number=60,
+                                                         repeat=repeat)
+
+
+def bench_target_index(repeat, counts=OBJECT_COUNTS):
+    for count in counts:
+        index = make_falling_objects(count)[1]
+
+        def run_index(index=index):
+            for ch in SEARCH_CHARS:
+                index.lowest(ch)
+
+        yield f'target_search[{count}]', measure(run_index, number=200, repeat=repeat) / len(SEARCH_CHARS)
+
+
+def bench_frames(repeat, counts=OBJECT_COUNTS):
+    """与 run_game 每帧的工作相同：一个模拟步 (含一次按键)、绘制整个画面、flip"""
+    pygame = tg.pygame
+    clock = tg.game_clock
+    rain = tg.DigitalRain(tg.WINDOW_PIXEL_WIDTH, tg.WINDOW_PIXEL_HEIGHT, tg.CHAR_WIDTH, tg.CHAR_HEIGHT, tg.font,
+                          seed=0)
+    renderer = tg.CastleRenderer(tg.font, tg.CHAR_WIDTH, tg.CHAR_HEIGHT)
+    for count in counts:
+        state = {}
+
+        def setup(count=count):
+            tg.particle_pool.clear()
+            objects, index = make_falling_objects(count, max_y=tg.WINDOW_PIXEL_HEIGHT / 2)
+            state['game_state'] = game_state = tg.new_game_state()
+            for obj in objects:
+                game_state['falling_objects'].append(obj)
+            game_state['target_index'] = index
+            state['frame'] = 0
+
+        def frame():
+            game_state = state['game_state']
+            state['frame'] += 1
+            clock.advance(FRAME_STEP)
+            tg.handle_keystroke(game_state, SEARCH_CHARS[state['frame'] % len(SEARCH_CHARS)])
+            tg.update_game(game_state, FRAME_STEP)
+            tg.draw_game(tg.screen, game_state, rain, renderer)
+            pygame.display.flip()
+
+        yield f'frame[{count}]', measure(frame, setup, number=60, repeat=repeat)
+    tg.particle_pool.clear()
+
+
+SUITE = {
+    'digital_rain': bench_digital_rain,
+    'text_glow': bench_text_glow,
+    'castle': bench_castle,
+    'explosion': bench_explosions,
+    'falling_object': bench_falling_object,
+    'object_store': bench_object_store,
+    'target_search': bench_target_index,
+    'frame': bench_frames,
+}
+
+
+def run_suite(groups=None, repeat=5):
+    """运行选中的分组，返回 {基准名: 微秒}"""
+    results = {}
+    for group in groups or SUITE:
+        prepare()
+        for name, us in SUITE[group](repeat):
+            results[name] = us
+    return results
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get('version') == BASELINE_VERSION else None
+
+
+def save_baseline(path, results, previous=None):
+    """写入基线；只运行了部分分组时保留旧基线中的其余项"""
+    merged = dict((previous or {}).get('results', {}))
+    merged.update({name: round(us, 4) for name, us in results.items()})
+    data = {'version': BASELINE_VERSION, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), **environment(),
+            'results': merged}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def environment():
+    return {'python': platform.python_version(), 'pygame': tg.pygame.version.ver, 'machine': platform.machine(),
+            'system': platform.system()}
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """返回 [(基准名, 基线微秒或 None, 当前微秒, 比值或 None, 是否退化), ...]"""
+    rows = []
+    for name, us in results.items():
+        base = baseline.get(name)
+        ratio = us / base if base else None
+        rows.append((name, base, us, ratio, ratio is not None and ratio > 1 + threshold))
+    return rows
+
+
+def run_command(args):
+    baseline = load_baseline(args.baseline)
+    results = run_suite(args.only, args.repeat)
+
+    if args.save:
+        save_baseline(args.baseline, results, baseline)
+        for name, us in results.items():
+            print(f"{name:<32} {us:>12.2f} us")
+        print(f"baseline saved -> {args.baseline}")
+        return 0
+
+    if baseline is None:
+        for name, us in results.items():
+            print(f"{name:<32} {us:>12.2f} us")
+        print(f"no baseline at {args.baseline}; run with --save to create one")
+        return 0
+
+    changed = {key: (baseline.get(key), value) for key, value in environment().items() if baseline.get(key) != value}
+    if changed:
+        print("warning: baseline was recorded in a different environment: " +
+              ", ".join(f"{key} {old} -> {new}" for key, (old, new) in changed.items()))
+
+    print(f"{'benchmark':<32} {'baseline (us)':>14} {'current (us)':>14} {'change':>8}")
+    regressions = 0
+    for name, base, us, ratio, regressed in compare(results, baseline['results'], args.threshold):
+        base_text = f"{base:>14.2f}" if base else f"{'-':>14}"
+        change_text = f"{(ratio - 1) * 100:>+7.1f}%" if ratio else f"{'new':>8}"
+        print(f"{name:<32} {base_text} {us:>14.2f} {change_text}{'  REGRESSION' if regressed else ''}")
+        regressions += regressed
+    if regressions:
+        print(f"{regressions} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typing Defender 性能基准")
+    parser.add_argument("benchmark", choices=["target_search", "run"])
+    parser.add_argument("--only", nargs="+", choices=list(SUITE), help="run: 只运行这些分组")
+    parser.add_argument("--repeat", type=int, default=5, help="run: 每项计时的轮数，取最小值")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="run: 基线 JSON 文件")
+    parser.add_argument("--save", action="store_true", help="run: 把结果写入基线而不比较")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="run: 允许的相对变慢比例，超过即失败 (默认 0.25)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark == "target_search":
+        print(f"{'objects':>8} {'linear (us)':>12} {'index (us)':>12} {'speedup':>8}")
+        for row in bench_target_search():
+            print(f"{row['objects']:>8} {row['linear_us']:>12.2f} {row['index_us']:>12.2f} {row['speedup']:>7.1f}x")
+    else:
+        return run_command(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
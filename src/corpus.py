@@ -0,0 +1,183 @@
+"""
+内存映射的大型词库
+
+词库文件为每行一个单词的纯文本 (可以是几十万词的字典或代码标识符列表)。
+文件通过 mmap 映射，不会整体读入为 Python 字符串；首次打开时用 NumPy 一次性扫描，
+按 (关卡, 字符集) 分桶建立偏移索引，并保存为旁边的 .idx.npz 文件，之后启动直接加载。
+抽词时只需在桶内随机取一个下标，再从映射中切出对应字节，为 O(1)。
+
+用法:
+    python corpus.py build words.txt    # 预先建立索引并打印各桶词数
+"""
+import argparse
+import bisect
+import mmap
+import os
+import random
+
+import numpy as np
+
+INDEX_VERSION = 2
+MAX_WORD_LENGTH = 24  # 超过这个长度的词放不进屏幕，直接忽略
+
+# 字符集分类，数值越大越宽松
+CHARSET_LETTERS = 0  # 纯字母
+CHARSET_ALNUM = 1  # 字母和数字
+CHARSET_CODE = 2  # 含游戏可输入符号的代码标识符
+CHARSET_INVALID = 3  # 含无法输入的字符
+CHARSET_NAMES = {'letters': CHARSET_LETTERS, 'alnum': CHARSET_ALNUM, 'code': CHARSET_CODE}
+CODE_SYMBOLS = b'_.,;'
+
+# 词库只为单词关卡供词；按词长划分: <=3 -> 6, 4 -> 7, 5-6 -> 8, 7-9 -> 9, >=10 -> 10
+FIRST_WORD_LEVEL = 6
+LEVEL_LENGTH_BOUNDS = np.array([3, 4, 6, 9])
+
+_BYTE_CLASS = np.full(256, CHARSET_INVALID, dtype=np.uint8)
+_BYTE_CLASS[ord('a'):ord('z') + 1] = CHARSET_LETTERS
+_BYTE_CLASS[ord('A'):ord('Z') + 1] = CHARSET_LETTERS
+_BYTE_CLASS[ord('0'):ord('9') + 1] = CHARSET_ALNUM
+_BYTE_CLASS[list(CODE_SYMBOLS)] = CHARSET_CODE
+_BYTE_CLASS[[ord('\n'), ord('\r')]] = CHARSET_LETTERS  # 行分隔符不影响分类
+
+
+def level_for_length(lengths):
+    return np.searchsorted(LEVEL_LENGTH_BOUNDS, lengths, side='left') + FIRST_WORD_LEVEL
+
+
+def bucket_key(level, charset):
+    return level * 4 + charset
+
+
+class WordCorpus:
+    """内存映射的词库，按 (关卡, 字符集) 分桶，支持 O(1) 随机抽词"""
+
+    def __init__(self, path, index_path=None):
+        self.path = path
+        self.index_path = index_path or path + '.idx.npz'
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        if not self._load_index():
+            self._build_index()
+            self._save_index()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _source_signature(self):
+        stat = os.stat(self.path)
+        return np.array([INDEX_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def _load_index(self):
+        try:
+            with np.load(self.index_path) as index:
+                if not np.array_equal(index['signature'], self._source_signature()):
+                    return False
+                self.offsets = index['offsets']
+                self.lengths = index['lengths']
+                self.bucket_keys = index['bucket_keys']
+                self.bucket_starts = index['bucket_starts']
+        except (OSError, KeyError, ValueError):
+            return False
+        self._build_lookup()
+        return True
+
+    def _save_index(self):
+        try:
+            with open(self.index_path, 'wb') as f:
+                np.savez(f, signature=self._source_signature(), offsets=self.offsets, lengths=self.lengths,
+                         bucket_keys=self.bucket_keys, bucket_starts=self.bucket_starts)
+        except OSError:
+            pass  # 目录不可写时只是无法持久化，索引仍然可用
+
+    def _build_index(self):
+        buf = np.frombuffer(self.data, dtype=np.uint8) if len(self.data) else np.zeros(0, dtype=np.uint8)
+        newlines = np.flatnonzero(buf == ord('\n'))
+        starts = np.concatenate(([0], newlines + 1)).astype(np.int64)
+        ends = np.concatenate((newlines, [len(buf)])).astype(np.int64)
+        # 去掉行尾的 \r
+        has_cr = ends > starts
+        has_cr[has_cr] = buf[ends[has_cr] - 1] == ord('\r')
+        ends -= has_cr
+        lengths = ends - starts
+
+        keep = (lengths > 0) & (lengths <= MAX_WORD_LENGTH)
+        starts, lengths = starts[keep], lengths[keep]
+        if len(starts):
+            # 每个词的字符集取其中最宽松的字节分类。按 [起点, 终点, 起点, 终点, ...] 分段归约并只取偶数段，
+            # 只统计词本身的字节，不会混入被跳过的超长行；末尾补一个字节，使终点可以等于文件长度
+            classes = np.append(_BYTE_CLASS[buf], np.uint8(CHARSET_LETTERS))
+            bounds = np.column_stack((starts, starts + lengths)).ravel()
+            charsets = np.maximum.reduceat(classes, bounds)[::2]
+        else:
+            charsets = np.zeros(0, dtype=np.uint8)
+
+        valid = charsets != CHARSET_INVALID
+        starts, lengths, charsets = starts[valid], lengths[valid], charsets[valid]
+        keys = bucket_key(level_for_length(lengths), charsets)
+        order = np.argsort(keys, kind='stable')
+
+        keys = keys[order]
+        self.offsets = starts[order]
+        self.lengths = lengths[order].astype(np.uint16)
+        self.bucket_keys, self.bucket_starts = np.unique(keys, return_index=True)
+        self.bucket_starts = np.append(self.bucket_starts, len(keys))
+        self._build_lookup()
+
+    def _build_lookup(self):
+        # 桶键 -> (起始下标, 词数)
+        self.buckets = {}
+        for i, key in enumerate(self.bucket_keys.tolist()):
+            start = int(self.bucket_starts[i])
+            self.buckets[key] = (start, int(self.bucket_starts[i + 1]) - start)
+
+    def bucket_size(self, level, charset):
+        return self.buckets.get(bucket_key(level, charset), (0, 0))[1]
+
+    def count(self, level, charsets=(CHARSET_LETTERS, CHARSET_ALNUM, CHARSET_CODE)):
+        return sum(self.bucket_size(level, c) for c in charsets)
+
+    def word_at(self, i):
+        offset = int(self.offsets[i])
+        return self.data[offset:offset + int(self.lengths[i])].decode('ascii')
+
+    def sample(self, level, charsets=(CHARSET_LETTERS, CHARSET_ALNUM, CHARSET_CODE), rng=random):
+        """从指定关卡和字符集中随机抽取一个词，没有可用词时返回 None"""
+        level = min(max(level, FIRST_WORD_LEVEL), FIRST_WORD_LEVEL + len(LEVEL_LENGTH_BOUNDS))
+        spans = [self.buckets[key] for key in (bucket_key(level, c) for c in charsets) if key in self.buckets]
+        if not spans:
+            return None
+
+        cumulative = []
+        total = 0
+        for _, size in spans:
+            total += size
+            cumulative.append(total)
+        pick = rng.randrange(total)
+        start, size = spans[bisect.bisect_right(cumulative, pick)]
+        return self.word_at(start + rng.randrange(size))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="词库索引工具")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("path", help="每行一个单词的词库文件")
+    args = parser.parse_args(argv)
+
+    corpus = WordCorpus(args.path)
+    print(f"{len(corpus)} words indexed -> {corpus.index_path}")
+    names = {v: k for k, v in CHARSET_NAMES.items()}
+    for level in range(FIRST_WORD_LEVEL, FIRST_WORD_LEVEL + len(LEVEL_LENGTH_BOUNDS) + 1):
+        sizes = ", ".join(f"{names[c]}={corpus.bucket_size(level, c)}" for c in sorted(names))
+        print(f"  level {level}: {sizes}")
+    corpus.close()
+
+
+if __name__ == "__main__":
+    main()
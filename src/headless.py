@@ -0,0 +1,144 @@
+"""
+无界面的确定性模拟模式
+
+使用 SDL 的 dummy 视频驱动、固定时间步长、可注入的模拟时钟和带种子的随机数，
+把脚本化的按键流 (或 batch.py 中的模拟打字员) 输入游戏逻辑，并报告模拟帧率、生成/击杀数量和最终得分。
+
+脚本格式：每行 "<秒数> <字符>"，# 开头的行为注释。例如:
+    0.50 F
+    1.25 G
+
+用法:
+    python headless.py --script keys.txt --seed 42 --duration 120
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import adaptive  # noqa: E402
+import keylog  # noqa: E402
+import typing_game as tg  # noqa: E402  (隐藏 pygame 欢迎信息的变量需在导入前设置)
+
+
+def load_script(path):
+    """读取按键脚本，返回按时间排序的 [(秒数, 字符), ...]"""
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            timestamp, char = line.split(None, 1)
+            events.append((float(timestamp), char[0]))
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def simulate(script=(), seed=0, duration=60.0, step=1 / 60, render=False, keylog_path=None,
+             adaptive_difficulty=False, levels=None, typist=None):
+    """以固定步长运行游戏逻辑，返回统计报告字典
+
+    levels 替换默认的 difficulty_levels；typist 提供 poll(game_state, now)，每步返回要按下的字符或 None
+    """
+    tg.app.init_font()  # 字符尺寸决定像素坐标，模拟结果与是否渲染无关
+    if render:
+        tg.app.init_display()
+    clock = tg.SimulationClock()
+    tg.set_clock(clock)
+    tg.seed_rng(seed)
+    random.seed(seed)
+    tg.particle_pool.clear()
+
+    game_state = tg.new_game_state(levels)
+    if keylog_path:
+        game_state['keylog'] = keylog.KeystrokeLog(keylog_path)
+    if adaptive_difficulty:
+        game_state['adaptive'] = adaptive.AdaptiveEngine(game_state['levels'])
+    digital_rain = castle_renderer = None
+    if render:
+        digital_rain = tg.DigitalRain(tg.WINDOW_PIXEL_WIDTH, tg.WINDOW_PIXEL_HEIGHT,
+                                      tg.CHAR_WIDTH, tg.CHAR_HEIGHT, tg.font, seed=seed)
+        castle_renderer = tg.CastleRenderer(tg.font, tg.CHAR_WIDTH, tg.CHAR_HEIGHT)
+
+    script = list(script)
+    next_event = 0
+    frames = 0
+    frames_with_allocations = 0
+    allocations_start = tg.allocation_counter.total
+    wall_start = time.perf_counter()
+
+    while clock.now() < duration and not game_state['game_over']:
+        clock.advance(step)
+        # 回放在本步之前到达的按键
+        while next_event < len(script) and script[next_event][0] <= clock.now():
+            tg.handle_keystroke(game_state, script[next_event][1], script[next_event][0])
+            next_event += 1
+        if typist:
+            typed_char = typist.poll(game_state, clock.now())
+            if typed_char:
+                tg.handle_keystroke(game_state, typed_char, clock.now())
+
+        allocations_before = tg.allocation_counter.total
+        tg.update_game(game_state, step)
+        if render:
+            tg.draw_game(tg.screen, game_state, digital_rain, castle_renderer)
+        if tg.allocation_counter.total != allocations_before:
+            frames_with_allocations += 1
+        frames += 1
+
+    wall_time = time.perf_counter() - wall_start
+    if game_state['keylog']:
+        game_state['keylog'].close()
+    stats = game_state['stats']
+    report = {
+        'seed': seed,
+        'frames': frames,
+        'simulated_seconds': round(clock.now(), 6),
+        'wall_seconds': round(wall_time, 6),
+        'frames_per_second': round(frames / wall_time, 1) if wall_time > 0 else None,
+        'spawned': stats['spawned'],
+        'killed': stats['killed'],
+        'castle_hits': stats['castle_hits'],
+        'keystrokes': stats['keystrokes'],
+        'score': game_state['score'],
+        'level': game_state['current_level'],
+        'game_over': game_state['game_over'],
+        'time_to_failure': round(clock.now(), 6) if game_state['game_over'] else None,
+        'allocations': tg.allocation_counter.total - allocations_start,
+        'frames_with_allocations': frames_with_allocations,
+    }
+    if render:
+        # 城堡层缓存的效果：整体重建次数、增量重绘的格子数和每帧绘制耗时
+        report['castle_draw'] = {'rebuilds': castle_renderer.rebuilds, 'cell_redraws': castle_renderer.cell_redraws,
+                                 'average_ms': round(castle_renderer.average_draw_ms(), 4)}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typing Defender 无界面确定性模拟")
+    parser.add_argument("--script", help="按键脚本文件")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=60.0, help="模拟的游戏时长 (秒)")
+    parser.add_argument("--step", type=float, default=1 / 60, help="固定时间步长 (秒)")
+    parser.add_argument("--render", action="store_true", help="同时在离屏表面上渲染每一帧")
+    parser.add_argument("--corpus", metavar="PATH", help="每行一个单词的词库文件，用于单词关卡")
+    parser.add_argument("--keylog", metavar="PATH", help="把每次按键追加记录到二进制日志")
+    parser.add_argument("--adaptive", action="store_true", help="开启自适应难度")
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        tg.load_corpus(args.corpus)
+    script = load_script(args.script) if args.script else []
+    report = simulate(script, seed=args.seed, duration=args.duration, step=args.step, render=args.render,
+                      keylog_path=args.keylog, adaptive_difficulty=args.adaptive)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
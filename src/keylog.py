@@ -0,0 +1,193 @@
+"""
+按键事件日志：紧凑的二进制格式、带缓冲的追加写入器和流式离线分析
+
+文件头 16 字节: 魔数 b'TTKL'、版本 (u16)、记录长度 (u16)、创建时间 (f64, Unix 秒)。
+之后是定长 15 字节的记录 (小端):
+    时间戳   f64  本局开始后的秒数
+    目标编号 u32  按键作用到的下落对象编号，0 表示没有目标
+    字符     u16  期望输入的字符的码位 (没有目标时为实际按下的字符)，错误率按这个键统计
+    标志     u8   FLAG_* 的组合
+
+分析器按块读取记录，内存占用与文件大小无关，可以处理数 GB 的历史日志。
+
+用法:
+    python keylog.py analyze logs/*.ttkl [--json]
+"""
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'TTKL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHd')
+RECORD = struct.Struct('<dIHB')
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('target', '<u4'), ('char', '<u2'), ('flags', 'u1')])
+
+FLAG_HIT = 1  # 按对了期望的字符 (没有目标时: 锁定了新目标)
+FLAG_RESET = 2  # 输入错误使当前目标的进度清零
+FLAG_COMPLETE = 4  # 按键完成了一个单词
+FLAG_SESSION_START = 8  # 一局中的第一条记录
+
+# 延迟直方图: 0-2000 ms，每 10 ms 一格，超出部分计入最后一格
+LATENCY_BIN_MS = 10
+LATENCY_MAX_MS = 2000
+IDLE_GAP = 5.0  # 相邻按键间隔超过这个秒数视为停顿，不计入延迟和打字时间
+
+
+class KeystrokeLog:
+    """带缓冲的追加写入器"""
+
+    def __init__(self, path, buffer_size=64 * 1024):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.first = True
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            read_header(path)  # 拒绝追加到格式不符的文件
+        self.file = open(path, 'ab')
+        if is_new:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time()))
+
+    def record(self, timestamp, char, target_id=0, hit=False, reset=False, complete=False):
+        flags = ((FLAG_HIT if hit else 0) | (FLAG_RESET if reset else 0) | (FLAG_COMPLETE if complete else 0)
+                 | (FLAG_SESSION_START if self.first else 0))
+        self.first = False
+        self.buffer += RECORD.pack(timestamp, target_id, min(ord(char), 0xFFFF), flags)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: 文件过短，不是按键日志")
+    magic, version, record_size, created = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path}: 不支持的按键日志格式")
+    return created
+
+
+def iter_chunks(path, chunk_records=1 << 18):
+    """按块产出记录数组，每块最多 chunk_records 条"""
+    read_header(path)
+    with open(path, 'rb') as f:
+        f.seek(HEADER.size)
+        while True:
+            data = f.read(chunk_records * RECORD.size)
+            usable = len(data) - len(data) % RECORD.size  # 忽略写到一半的尾部记录
+            if not usable:
+                break
+            yield np.frombuffer(data[:usable], dtype=RECORD_DTYPE)
+
+
+class KeystrokeAnalyzer:
+    """流式统计 WPM、各键错误率和按键间隔直方图"""
+
+    def __init__(self):
+        self.keystrokes = 0
+        self.hits = 0
+        self.resets = 0
+        self.words = 0
+        self.active_time = 0.0
+        self.key_counts = np.zeros(0x10000, dtype=np.int64)
+        self.key_errors = np.zeros(0x10000, dtype=np.int64)
+        self.latency_edges = np.arange(0, LATENCY_MAX_MS + LATENCY_BIN_MS, LATENCY_BIN_MS) / 1000
+        self.latency_hist = np.zeros(len(self.latency_edges), dtype=np.int64)
+        self.last_time = None
+
+    def add_file(self, path, chunk_records=1 << 18):
+        self.last_time = None  # 不跨文件计算间隔
+        for chunk in iter_chunks(path, chunk_records):
+            self.add_chunk(chunk)
+
+    def add_chunk(self, chunk):
+        flags = chunk['flags']
+        hit = (flags & FLAG_HIT) != 0
+        self.keystrokes += len(chunk)
+        self.hits += int(hit.sum())
+        self.resets += int(((flags & FLAG_RESET) != 0).sum())
+        self.words += int(((flags & FLAG_COMPLETE) != 0).sum())
+        self.key_counts += np.bincount(chunk['char'], minlength=0x10000)
+        self.key_errors += np.bincount(chunk['char'][~hit], minlength=0x10000)
+
+        # 按键间隔，需要衔接上一块的最后一个时间戳
+        times = chunk['time']
+        previous = np.concatenate(([np.nan if self.last_time is None else self.last_time], times[:-1]))
+        gaps = times - previous
+        valid = ((flags & FLAG_SESSION_START) == 0) & (gaps > 0) & (gaps <= IDLE_GAP)
+        gaps = gaps[valid]
+        self.active_time += float(gaps.sum())
+        bins = np.minimum(np.searchsorted(self.latency_edges, gaps, side='right') - 1, len(self.latency_hist) - 1)
+        self.latency_hist += np.bincount(bins, minlength=len(self.latency_hist))
+        self.last_time = float(times[-1])
+
+    def latency_percentile(self, q):
+        total = self.latency_hist.sum()
+        if not total:
+            return None
+        index = int(np.searchsorted(np.cumsum(self.latency_hist), q * total))
+        return (index + 1) * LATENCY_BIN_MS  # 所在格的上界 (毫秒)
+
+    def report(self, min_samples=20, top=10):
+        wpm = (self.hits / 5) / (self.active_time / 60) if self.active_time > 0 else 0.0
+        keys = np.flatnonzero(self.key_counts >= min_samples)
+        rates = self.key_errors[keys] / self.key_counts[keys]
+        worst = keys[np.argsort(-rates, kind='stable')][:top]
+        return {
+            'keystrokes': self.keystrokes,
+            'accuracy': self.hits / self.keystrokes if self.keystrokes else None,
+            'words': self.words,
+            'progress_resets': self.resets,
+            'active_minutes': self.active_time / 60,
+            'wpm': wpm,
+            'worst_keys': [{'key': chr(k), 'count': int(self.key_counts[k]),
+                            'error_rate': float(self.key_errors[k] / self.key_counts[k])} for k in worst.tolist()],
+            'latency_ms': {f'p{int(q * 100)}': self.latency_percentile(q) for q in (0.5, 0.9, 0.99)},
+            'latency_histogram': {'bin_ms': LATENCY_BIN_MS, 'counts': self.latency_hist.tolist()},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按键日志分析")
+    parser.add_argument("command", choices=["analyze"])
+    parser.add_argument("paths", nargs="+", help="按键日志文件")
+    parser.add_argument("--json", action="store_true", help="输出完整的 JSON 报告 (含直方图)")
+    args = parser.parse_args(argv)
+
+    analyzer = KeystrokeAnalyzer()
+    for path in args.paths:
+        analyzer.add_file(path)
+    report = analyzer.report()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    if not report['keystrokes']:
+        print("no keystrokes recorded")
+        return
+    print(f"keystrokes: {report['keystrokes']}  words: {report['words']}  accuracy: {report['accuracy']:.1%}")
+    print(f"WPM: {report['wpm']:.1f} over {report['active_minutes']:.1f} active minutes")
+    print("latency (ms): " + "  ".join(f"{k}={v}" for k, v in report['latency_ms'].items()))
+    for entry in report['worst_keys']:
+        print(f"  {entry['key']!r}: {entry['error_rate']:.1%} errors over {entry['count']} presses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,620 @@
+"""
+多人竞速模式
+
+服务器进程拥有唯一的 game_state 和生成序列，按固定步长推进模拟；所有玩家面对同一批下落对象，
+谁先打完一个词谁得分。客户端 (typing_game.py --race) 只保存镜像状态用于显示。
+
+协议为 TCP 上每行一条的紧凑 JSON。坐标以字符格为单位，与各端的字体尺寸无关。
+对象以恒定速度下落，服务器只在对象出现时发送一次位置和速度，之后由客户端自行推算；
+因此每次广播只包含变化 (增量压缩)，数据量取决于事件频率，而与屏幕上的对象数量无关:
+    a  新对象 [编号, 文本, 列, 行, 速度(格/秒), 奖励]
+    r  移除 [编号, 击杀者编号 (0 表示撞上城堡或落到地面)]
+    s  变化的得分 {玩家编号: 得分}      n  新加入的玩家 {玩家编号: 名字}      x  离开的玩家
+    c  城堡变化的格子 [[行, 列, 耐久], ...]    l  关卡    o  游戏结束
+公共增量对所有客户端只编码一次；每个玩家自己的输入进度 p [目标编号, 进度, 已处理的按键序号]
+单独发给本人。客户端本地预测按键结果，收到确认后再与服务器对齐。
+发送缓冲积压过多的慢客户端暂停接收增量，缓冲排空后改发一份完整快照 (snap)，
+保证带宽和延迟都有上限。
+
+用法:
+    python race.py serve --port 8765 --seed 1
+    python typing_game.py --race 127.0.0.1:8765 --name alice
+    python race.py loadtest --clients 50 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+import typing_game as tg
+
+DEFAULT_PORT = 8765
+BROADCAST_HZ = 60
+MAX_CLIENT_BUFFER = 256 * 1024  # 发送缓冲超过这个字节数时视为跟不上，改为稍后重发快照
+HEARTBEAT_INTERVAL = 1.0  # 没有变化时也至少每隔这么久广播一次
+
+
+def encode(message):
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port or DEFAULT_PORT)
+
+
+def is_typable(char):
+    return bool(char) and (char.isalnum() or char in tg.TYPABLE_SYMBOLS)
+
+
+def parse_key(message):
+    """校验客户端的按键消息 {"k": 字符, "q": 序号}，合法时返回 (序号, 字符)，否则返回 None"""
+    if not isinstance(message, dict):
+        return None
+    char, seq = message.get('k'), message.get('q')
+    if not isinstance(char, str) or len(char) != 1 or not isinstance(seq, int) or isinstance(seq, bool):
+        return None
+    return seq, char
+
+
+def apply_race_key(target_index, target, progress, char):
+    """按单人模式的规则推进一名玩家的输入，返回 (目标, 进度, 是否完成)
+
+    进度按玩家分别记录，不写入共享的下落对象；目标已被别人打完或撞上城堡时视为没有目标。
+    """
+    char = char.upper()
+    if target is not None and not target.active:
+        target = None
+    if target is not None:
+        if char == target.text[progress]:
+            progress += 1
+            return target, progress, progress == len(target.text)
+        target = None  # 输入错误，取消目标，并尝试用这个字符锁定新目标
+    target = target_index.lowest(char)
+    if target is None:
+        return None, 0, False
+    return target, 1, len(target.text) == 1
+
+
+def encode_object(obj):
+    return [obj.id, obj.text, obj.pixel_x // tg.CHAR_WIDTH, round(float(obj.pixel_y_float) / tg.CHAR_HEIGHT, 3),
+            obj.speed_pixel_per_sec / tg.CHAR_HEIGHT, 1 if obj.is_bonus else 0]
+
+
+# ==============================================================================
+# 服务器
+# ==============================================================================
+class Player:
+    __slots__ = ('id', 'name', 'writer', 'score', 'target', 'progress', 'seq', 'needs_snapshot')
+
+    def __init__(self, player_id, name, writer):
+        self.id = player_id
+        self.name = name
+        self.writer = writer
+        self.score = 0
+        self.target = None
+        self.progress = 0
+        self.seq = 0  # 已处理的最后一个按键序号
+        self.needs_snapshot = True
+
+
+class RaceServer:
+    """持有权威 game_state 的竞速服务器"""
+
+    def __init__(self, seed=0, step=tg.SIMULATION_STEP, broadcast_hz=BROADCAST_HZ, start_level=1):
+        tg.app.init_font()
+        self.step = step
+        self.broadcast_interval = 1 / broadcast_hz
+        self.clock = tg.SimulationClock()
+        tg.set_clock(self.clock)
+        tg.seed_rng(seed)
+        self.game_state = tg.new_game_state()
+        self.game_state['current_level'] = start_level
+        self.tick = 0
+
+        self.players = {}
+        self.next_player_id = 1
+        self.pending_keys = deque()  # (玩家, 序号, 字符)
+        self.known = {}  # 客户端已知的对象: 编号 -> FallingObject
+        self.kills = {}  # 本次广播前被打完的对象: 编号 -> 玩家编号
+        self.changed_scores = set()
+        self.changed_progress = set()
+        self.joined = []
+        self.left = []
+        self.level = self.game_state['current_level']
+        self.game_over = False
+        self.last_broadcast = 0.0
+
+        # 统计
+        self.tick_ms = deque(maxlen=4096)
+        self.bytes_sent = 0
+        self.keys_processed = 0
+        self.snapshots_sent = 0
+        self.peak_players = 0
+
+    # ------------------------------------------------------------------
+    # 连接
+    # ------------------------------------------------------------------
+    async def handle_client(self, reader, writer):
+        try:
+            hello = json.loads(await reader.readline() or b'{}')
+        except ValueError:
+            writer.close()
+            return
+        if not isinstance(hello, dict):
+            writer.close()
+            return
+        if hello.get('stats'):
+            writer.write(encode(self.stats()))
+            await writer.drain()
+            writer.close()
+            return
+
+        player = Player(self.next_player_id, str(hello.get('name', ''))[:16] or f"P{self.next_player_id}", writer)
+        self.next_player_id += 1
+        self.players[player.id] = player
+        self.peak_players = max(self.peak_players, len(self.players))
+        self.joined.append(player)
+        writer.write(encode({'welcome': player.id, 'step': self.step}))
+        try:
+            # 消息先在这里校验，错误的输入只会断开发送者，不会进入所有玩家共享的模拟步
+            async for line in reader:
+                key = parse_key(json.loads(line))
+                if key is None:
+                    break
+                self.pending_keys.append((player, *key))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            del self.players[player.id]
+            self.left.append(player.id)
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # 模拟
+    # ------------------------------------------------------------------
+    def apply_key(self, player, seq, char):
+        player.seq = seq
+        self.changed_progress.add(player)
+        self.keys_processed += 1
+        if self.game_over or not is_typable(char):
+            return
+        target, progress, complete = apply_race_key(self.game_state['target_index'], player.target,
+                                                    player.progress, char)
+        if complete:
+            target.active = False
+            points = len(target.text) * 10
+            player.score += points * 2 if target.is_bonus else points
+            self.kills[target.id] = player.id
+            self.game_state['stats']['killed'] += 1
+            self.changed_scores.add(player)
+            target, progress = None, 0
+        player.target, player.progress = target, progress
+
+    def advance(self):
+        """推进一个模拟步：处理排队的按键后更新共享状态；关卡按领先者的得分计算"""
+        self.clock.advance(self.step)
+        while self.pending_keys:
+            self.apply_key(*self.pending_keys.popleft())
+        self.game_state['score'] = max((p.score for p in self.players.values()), default=0)
+        tg.update_game(self.game_state, self.step)
+
+    # ------------------------------------------------------------------
+    # 广播
+    # ------------------------------------------------------------------
+    def snapshot(self):
+        gs = self.game_state
+        return {'snap': {
+            'k': self.tick,
+            'a': [encode_object(obj) for obj in gs['falling_objects'] if obj.active],
+            's': {p.id: p.score for p in self.players.values()},
+            'n': {p.id: p.name for p in self.players.values()},
+            'c': gs['castle'].damaged_cells(), 'l': gs['current_level'], 'o': gs['game_over'],
+        }}
+
+    def collect_delta(self):
+        gs = self.game_state
+        delta = {}
+        removed = []
+        for object_id, obj in list(self.known.items()):
+            if not obj.active:
+                removed.append([object_id, self.kills.pop(object_id, 0)])
+                del self.known[object_id]
+        self.kills.clear()
+        added = [obj for obj in gs['falling_objects'] if obj.active and obj.id not in self.known]
+        for obj in added:
+            self.known[obj.id] = obj
+        if added:
+            delta['a'] = [encode_object(obj) for obj in added]
+        if removed:
+            delta['r'] = removed
+            # 目标被移除的玩家进度清零
+            for player in self.players.values():
+                if player.target is not None and not player.target.active:
+                    player.target, player.progress = None, 0
+                    self.changed_progress.add(player)
+        if self.changed_scores:
+            delta['s'] = {p.id: p.score for p in self.changed_scores}
+            self.changed_scores.clear()
+        if self.joined:
+            delta['n'] = {p.id: p.name for p in self.joined}
+            self.joined.clear()
+        if self.left:
+            delta['x'] = self.left
+            self.left = []
+        if gs['castle'].dirty:
+            castle = gs['castle']
+            delta['c'] = [[r, c, int(castle.health[r, c])] for r, c in sorted(castle.take_dirty())]
+        if gs['current_level'] != self.level:
+            self.level = delta['l'] = gs['current_level']
+        if gs['game_over'] and not self.game_over:
+            self.game_over = delta['o'] = True
+        return delta
+
+    def broadcast(self, now):
+        delta = self.collect_delta()
+        progress = self.changed_progress
+        self.changed_progress = set()
+        if not delta and not progress and now - self.last_broadcast < HEARTBEAT_INTERVAL:
+            return
+        self.last_broadcast = now
+        delta['k'] = self.tick
+        shared = encode(delta)
+        snapshot = None
+        for player in self.players.values():
+            transport = player.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                player.needs_snapshot = True  # 跟不上：丢弃增量，等缓冲排空后重发快照
+                continue
+            if player.needs_snapshot:
+                if snapshot is None:
+                    snapshot = encode(self.snapshot())
+                data = snapshot
+                player.needs_snapshot = False
+                self.snapshots_sent += 1
+            else:
+                data = shared
+            if player in progress or data is snapshot:
+                data += encode({'p': [player.target.id if player.target else 0, player.progress, player.seq]})
+            player.writer.write(data)
+            self.bytes_sent += len(data)
+
+    async def serve(self, host='0.0.0.0', port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"race server listening on {host}:{port}", flush=True)
+        scheduler = tg.FixedStepScheduler(self.step)
+        scheduler.start(time.perf_counter())
+        next_tick = time.perf_counter()
+        async with server:
+            while True:
+                frame_start = time.perf_counter()
+                for _ in range(scheduler.advance(frame_start)):
+                    self.advance()
+                self.tick += 1
+                self.broadcast(frame_start)
+                now = time.perf_counter()
+                self.tick_ms.append((now - frame_start) * 1000)
+                # 按绝对时刻排下一次广播，sleep 的超时不会累积；落后超过一个周期时重新对齐
+                next_tick += self.broadcast_interval
+                if next_tick < now - self.broadcast_interval:
+                    next_tick = now
+                await asyncio.sleep(max(0.0, next_tick - now))
+
+    def stats(self):
+        tick_ms = np.array(self.tick_ms) if self.tick_ms else np.zeros(1)
+        return {
+            'players': len(self.players),
+            'peak_players': self.peak_players,
+            'ticks': self.tick,
+            'tick_ms': {'p50': round(float(np.percentile(tick_ms, 50)), 3),
+                        'p99': round(float(np.percentile(tick_ms, 99)), 3),
+                        'max': round(float(tick_ms.max()), 3)},
+            'bytes_sent': self.bytes_sent,
+            'keys_processed': self.keys_processed,
+            'snapshots_sent': self.snapshots_sent,
+            'objects': len(self.game_state['falling_objects']),
+            'level': self.game_state['current_level'],
+        }
+
+
+# ==============================================================================
+# 客户端
+# ==============================================================================
+class RaceClient:
+    """服务器状态的本地镜像
+
+    handle_keystroke / update 与 typing_game 中同名函数的签名一致，run_game 可以直接替换使用。
+    """
+
+    def __init__(self, reader, writer, player_id, name, effects=True):
+        self.reader = reader
+        self.writer = writer
+        self.player_id = player_id
+        self.name = name
+        self.effects = effects
+        self.game_state = tg.new_game_state()
+        self.objects = {}
+        self.scores = {}
+        self.names = {}
+        self.progress = 0
+        self.seq = 0
+        self.inbox = deque()
+        self.closed = False
+        self.reader_task = asyncio.create_task(self._read())
+
+        # 统计 (压力测试使用)
+        self.sent_at = {}  # 按键序号 -> 发送时间
+        self.latencies = []
+        self.bytes_received = 0
+        self.snapshots = 0
+
+    @classmethod
+    async def connect(cls, host, port, name, effects=True):
+        tg.app.init_font()  # 坐标换算需要字符尺寸
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(encode({'name': name}))
+        welcome = json.loads(await reader.readline())
+        return cls(reader, writer, welcome['welcome'], name, effects)
+
+    async def _read(self):
+        try:
+            async for line in self.reader:
+                self.bytes_received += len(line)
+                self.inbox.append(json.loads(line))
+        except ConnectionError:
+            pass
+        self.closed = True
+
+    def close(self):
+        self.reader_task.cancel()
+        self.writer.close()
+
+    # ------------------------------------------------------------------
+    # 输入：本地预测，并把按键发给服务器
+    # ------------------------------------------------------------------
+    def _set_target(self, target, progress):
+        current = self.game_state['current_target']
+        if current is not None and current is not target:
+            current.progress = 0
+        if target is not None:
+            target.progress = progress
+        self.game_state['current_target'] = target
+        self.progress = progress
+
+    def handle_keystroke(self, game_state, typed_char, timestamp=None):
+        if not is_typable(typed_char) or self.closed:
+            return
+        self.seq += 1
+        self.sent_at[self.seq] = time.perf_counter()
+        self.writer.write(encode({'k': typed_char, 'q': self.seq}))
+        game_state['stats']['keystrokes'] += 1
+
+        target, progress, complete = apply_race_key(game_state['target_index'], game_state['current_target'],
+                                                    self.progress, typed_char)
+        if complete:
+            target.active = False  # 先隐藏，得分以服务器为准
+            target, progress = None, 0
+        self._set_target(target, progress)
+
+    # ------------------------------------------------------------------
+    # 更新：应用服务器消息，再按本地步长推算下落位置
+    # ------------------------------------------------------------------
+    def update(self, game_state, dt):
+        while self.inbox:
+            message = self.inbox.popleft()
+            if 'snap' in message:
+                self._apply_snapshot(message['snap'])
+            elif 'p' in message:
+                self._apply_progress(*message['p'])
+            else:
+                self._apply_delta(message)
+        game_state['falling_objects'].move(dt)
+        game_state['explosions'] = [e for e in game_state['explosions'] if e.update(dt)]
+        game_state['lasers'] = [l for l in game_state['lasers'] if l.is_active()]
+        if self.effects:
+            tg.particle_pool.update(dt)
+
+    def _add_object(self, entry):
+        object_id, text, column, row, speed, bonus = entry
+        obj = tg.FallingObject(text, speed, bool(bonus), object_id)
+        obj.pixel_x = column * tg.CHAR_WIDTH
+        obj._y = row * tg.CHAR_HEIGHT
+        self.game_state['falling_objects'].append(obj)
+        self.game_state['target_index'].add(obj)
+        self.objects[object_id] = obj
+
+    def _apply_snapshot(self, snap):
+        self.snapshots += 1
+        gs = self.game_state
+        gs['falling_objects'] = tg.FallingObjectStore()
+        gs['target_index'] = tg.TargetIndex()
+        gs['current_target'] = None
+        self.objects = {}
+        self.progress = 0
+        for entry in sorted(snap['a']):  # 按编号 (生成顺序) 加入，TargetIndex 依赖这个顺序
+            self._add_object(entry)
+        self.scores = {int(k): v for k, v in snap['s'].items()}
+        self.names = {int(k): v for k, v in snap['n'].items()}
+        gs['score'] = self.scores.get(self.player_id, 0)
+        gs['castle'] = tg.Castle(tg.initial_castle_art, tg.core_position_grid)
+        gs['castle'].apply_cells(snap['c'])
+        gs['current_level'] = snap['l']
+        gs['game_over'] = snap['o']
+
+    def _apply_delta(self, delta):
+        gs = self.game_state
+        for entry in delta.get('a', ()):
+            self._add_object(entry)
+        if 'r' in delta:
+            for object_id, killer in delta['r']:
+                obj = self.objects.pop(object_id, None)
+                if obj is None:
+                    continue
+                if obj is gs['current_target']:
+                    self._set_target(None, 0)
+                if self.effects:
+                    if killer:
+                        gs['lasers'].append(tg.Laser(tg.core_screen_position(gs), obj.get_center_position()))
+                    elif gs['castle'].covers(obj.pixel_x // tg.CHAR_WIDTH,
+                                             obj.pixel_x // tg.CHAR_WIDTH + len(obj.text) - 1):
+                        # 城堡的变化 (c) 在移除之后才应用，这里看到的是撞击前的城堡
+                        gs['explosions'].append(tg.Explosion(obj.get_center_position()[0], obj.get_bottom_pixel_y(),
+                                                             tg.RED))
+                        gs['screen_shake'].start(magnitude=8, duration=0.3)
+                obj.active = False
+            gs['falling_objects'].remove_inactive()
+        for player_id, score in delta.get('s', {}).items():
+            self.scores[int(player_id)] = score
+        for player_id, name in delta.get('n', {}).items():
+            self.names[int(player_id)] = name
+        for player_id in delta.get('x', ()):
+            self.scores.pop(player_id, None)
+            self.names.pop(player_id, None)
+        gs['score'] = self.scores.get(self.player_id, 0)
+        if 'c' in delta:
+            gs['castle'].apply_cells(delta['c'])
+        if 'l' in delta:
+            gs['current_level'] = delta['l']
+            gs['level_up_timer'] = tg.game_clock.now()
+        if delta.get('o'):
+            gs['game_over'] = True
+
+    def _apply_progress(self, target_id, progress, seq):
+        now = time.perf_counter()
+        for acked in [s for s in self.sent_at if s <= seq]:
+            self.latencies.append((now - self.sent_at.pop(acked)) * 1000)
+        if seq >= self.seq:
+            # 没有未确认的按键时以服务器为准；否则保留本地预测，等待后续确认
+            target = self.objects.get(target_id)
+            self._set_target(target, progress if target is not None else 0)
+
+    # ------------------------------------------------------------------
+    # 排行榜
+    # ------------------------------------------------------------------
+    def standings(self, top=5):
+        ranked = sorted(self.scores.items(), key=lambda item: (-item[1], item[0]))[:top]
+        return [(self.names.get(player_id, '?'), score, player_id == self.player_id) for player_id, score in ranked]
+
+    def draw_standings(self, surface):
+        x = surface.get_width() - 16 * tg.CHAR_WIDTH
+        for i, (name, score, is_self) in enumerate(self.standings()):
+            color = tg.YELLOW if is_self else tg.WHITE
+            tg.draw_text_glow(surface, f"{i + 1}. {name[:8]:<8} {score:>5}", (x, 10 + i * tg.CHAR_HEIGHT), tg.font,
+                              color, tg.BLUE)
+
+
+# ==============================================================================
+# 压力测试
+# ==============================================================================
+async def simulated_client(host, port, index, duration, wpm, error_rate, results):
+    """一个无界面的模拟玩家：以 60 Hz 更新镜像，由模拟打字员按键"""
+    import batch  # 只在压力测试中需要 (会选择 SDL 的 dummy 驱动)
+
+    client = await RaceClient.connect(host, port, f"bot{index}", effects=False)
+    typist = batch.SyntheticTypist(wpm, error_rate, seed=index)
+    step = 1 / 60
+    start = next_tick = time.perf_counter()
+    while not client.closed and time.perf_counter() - start < duration:
+        client.update(client.game_state, step)
+        typed_char = typist.poll(client.game_state, time.perf_counter() - start)
+        if typed_char:
+            client.handle_keystroke(client.game_state, typed_char)
+        next_tick += step
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    results.append({'latencies': client.latencies, 'bytes_per_second': client.bytes_received / elapsed,
+                    'keys': client.seq, 'snapshots': client.snapshots,
+                    'score': client.scores.get(client.player_id, 0)})
+    client.close()
+
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({'stats': True}))
+    stats = json.loads(await reader.readline())
+    writer.close()
+    return stats
+
+
+async def wait_for_server(host, port, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return await fetch_stats(host, port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def load_test(clients=50, duration=30.0, wpm=40.0, error_rate=0.05, address=None, seed=0, level=1):
+    """启动 (或连接) 服务器，运行若干模拟玩家，汇总按键确认延迟、带宽和服务器帧耗时"""
+    server_process = None
+    if address:
+        host, port = parse_address(address)
+    else:
+        host, port = '127.0.0.1', DEFAULT_PORT + 1
+        env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+        server_process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), 'serve', '--host', host, '--port', str(port),
+            '--seed', str(seed), '--level', str(level), stdout=asyncio.subprocess.DEVNULL, env=env)
+    try:
+        await wait_for_server(host, port)
+        results = []
+        await asyncio.gather(*(simulated_client(host, port, i, duration, wpm, error_rate, results)
+                               for i in range(clients)))
+        server_stats = await fetch_stats(host, port)
+    finally:
+        if server_process:
+            server_process.terminate()
+            await server_process.wait()
+
+    latencies = np.concatenate([r['latencies'] for r in results if r['latencies']] or [np.zeros(0)])
+    bandwidth = np.array([r['bytes_per_second'] for r in results])
+    return {
+        'clients': len(results),
+        'duration': duration,
+        'keys': sum(r['keys'] for r in results),
+        'ack_latency_ms': {f'p{q}': round(float(np.percentile(latencies, q)), 2) for q in (50, 95, 99)}
+        if len(latencies) else None,
+        'client_bytes_per_second': {'mean': round(float(bandwidth.mean()), 1), 'max': round(float(bandwidth.max()), 1)},
+        'client_resyncs': sum(r['snapshots'] for r in results) - len(results),
+        'top_score': max(r['score'] for r in results),
+        'server': server_stats,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typing Defender 多人竞速")
+    parser.add_argument("command", choices=["serve", "loadtest"])
+    parser.add_argument("--host", default="0.0.0.0", help="serve: 监听地址")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="serve: 监听端口")
+    parser.add_argument("--seed", type=int, default=0, help="生成序列的随机种子")
+    parser.add_argument("--level", type=int, default=1, help="起始关卡")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="loadtest: 连接已运行的服务器，默认自行启动一个")
+    parser.add_argument("--clients", type=int, default=50, help="loadtest: 模拟玩家数")
+    parser.add_argument("--duration", type=float, default=30.0, help="loadtest: 持续秒数")
+    parser.add_argument("--wpm", type=float, default=40.0, help="loadtest: 模拟玩家的打字速度")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="loadtest: 模拟玩家的出错概率")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(RaceServer(seed=args.seed, start_level=args.level).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        report = asyncio.run(load_test(args.clients, args.duration, args.wpm, args.error_rate, args.connect,
+                                       args.seed, args.level))
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
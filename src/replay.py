@@ -0,0 +1,198 @@
+"""
+会话回放
+
+根据 session.py 录制的种子和按键流，逐步重现一局游戏:
+    - fast:      不渲染，以最快速度快进 (一小时的会话只需数秒)，输出统计报告
+    - play:      打开窗口按真实时间 (或 --speed 倍速) 回放，可用 --start 跳到指定时刻
+    - snapshots: 快进一遍并每隔 --interval 秒保存一次 game_state 快照，供之后快速定位
+
+用法:
+    python replay.py fast session.jsonl [--until 600]
+    python replay.py snapshots session.jsonl --interval 60
+    python replay.py play session.jsonl --start 1800 --speed 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import adaptive  # noqa: E402
+import session  # noqa: E402
+import typing_game as tg  # noqa: E402
+
+SNAPSHOT_INTERVAL = 60.0  # 秒
+
+
+def snapshot_path(session_path):
+    return session_path + '.snap'
+
+
+class Replayer:
+    """按模拟步重放会话，可保存快照并跳转到任意时刻"""
+
+    def __init__(self, recorded, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.session = recorded
+        self.step = recorded.step
+        self.snapshot_every = max(1, round(snapshot_interval / self.step))
+        self.snapshots = {}  # 模拟步序号 -> 序列化的快照
+
+        tg.app.init_font()
+        options = recorded.options
+        if options.get('corpus'):
+            tg.load_corpus(options['corpus'], options.get('corpus_charsets'))
+        self.clock = tg.SimulationClock()
+        tg.set_clock(self.clock)
+        tg.seed_rng(recorded.seed)
+        tg.particle_pool.clear()
+        self.game_state = tg.new_game_state()
+        if options.get('adaptive'):
+            self.game_state['adaptive'] = adaptive.AdaptiveEngine(tg.difficulty_levels)
+        self.step_index = 0
+        self.key_cursor = 0
+        self.take_snapshot()
+
+    @property
+    def done(self):
+        return self.step_index >= self.session.end_step or self.game_state['game_over']
+
+    def advance(self):
+        """执行一个模拟步，与 run_game 中的顺序一致：推进时钟、处理本步的按键、更新逻辑"""
+        self.clock.advance(self.step)
+        self.step_index += 1
+        keys = self.session.keys
+        while self.key_cursor < len(keys) and keys[self.key_cursor][0] <= self.step_index:
+            _, typed_char, arrival = keys[self.key_cursor]
+            tg.handle_keystroke(self.game_state, typed_char, arrival)
+            self.key_cursor += 1
+        tg.update_game(self.game_state, self.step)
+        if self.step_index % self.snapshot_every == 0 and self.step_index not in self.snapshots:
+            self.take_snapshot()
+
+    def run_to(self, target_step):
+        while self.step_index < target_step and not self.done:
+            self.advance()
+
+    def take_snapshot(self):
+        state = (self.game_state, tg.rng.getstate(), self.clock.time, self.step_index, self.key_cursor)
+        self.snapshots[self.step_index] = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+    def restore(self, step_index):
+        game_state, rng_state, clock_time, self.step_index, self.key_cursor = pickle.loads(self.snapshots[step_index])
+        self.game_state = game_state
+        tg.rng.setstate(rng_state)
+        self.clock.time = clock_time
+        tg.particle_pool.clear()
+
+    def seek(self, seconds):
+        """跳到第 seconds 秒：从不晚于目标的最近快照恢复，再快进剩余部分"""
+        target = round(seconds / self.step)
+        nearest = max(s for s in self.snapshots if s <= target)
+        if target < self.step_index or nearest > self.step_index:
+            self.restore(nearest)
+        self.run_to(target)
+
+    def save_snapshots(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump({'seed': self.session.seed, 'step': self.step, 'snapshots': self.snapshots}, f,
+                        pickle.HIGHEST_PROTOCOL)
+
+    def load_snapshots(self, path):
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data['seed'] == self.session.seed and data['step'] == self.step:
+            self.snapshots.update(data['snapshots'])
+
+    def report(self):
+        stats = self.game_state['stats']
+        return {
+            'seed': self.session.seed,
+            'steps': self.step_index,
+            'simulated_seconds': round(self.step_index * self.step, 3),
+            'spawned': stats['spawned'],
+            'killed': stats['killed'],
+            'castle_hits': stats['castle_hits'],
+            'keystrokes': stats['keystrokes'],
+            'score': self.game_state['score'],
+            'level': self.game_state['current_level'],
+            'game_over': self.game_state['game_over'],
+            'recorded_score': (self.session.end or {}).get('score'),
+        }
+
+
+async def play_realtime(replayer, speed=1.0):
+    """在窗口中按真实时间回放，Esc 或关闭窗口结束，F3 切换耗时叠加层"""
+    pygame = tg.pygame
+    tg.app.init_display()
+    digital_rain = tg.DigitalRain(tg.WINDOW_PIXEL_WIDTH, tg.WINDOW_PIXEL_HEIGHT, tg.CHAR_WIDTH, tg.CHAR_HEIGHT,
+                                  tg.font)
+    castle_renderer = tg.CastleRenderer(tg.font, tg.CHAR_WIDTH, tg.CHAR_HEIGHT)
+    scheduler = tg.FixedStepScheduler(step=replayer.step / speed)
+    render_interval = 1 / tg.display_refresh_rate()
+    scheduler.start(time.perf_counter())
+
+    running = True
+    while running:
+        frame_start = time.perf_counter()
+        tg.frame_profiler.begin_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                tg.frame_profiler.toggle_overlay()
+        tg.frame_profiler.mark('events')
+
+        for _ in range(scheduler.advance(frame_start)):
+            if not replayer.done:
+                replayer.advance()
+
+        tg.draw_game(tg.screen, replayer.game_state, digital_rain, castle_renderer, scheduler.alpha)
+        pygame.display.flip()
+        tg.frame_profiler.mark('flip')
+        tg.frame_profiler.end_frame()
+        await asyncio.sleep(max(0.0, frame_start + render_interval - time.perf_counter()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typing Defender 会话回放")
+    parser.add_argument("mode", choices=["fast", "play", "snapshots"])
+    parser.add_argument("session", help="run_game --record 录制的会话文件")
+    parser.add_argument("--until", type=float, help="fast 模式下只快进到第几秒")
+    parser.add_argument("--start", type=float, default=0.0, help="play 模式下从第几秒开始")
+    parser.add_argument("--speed", type=float, default=1.0, help="play 模式的回放倍速")
+    parser.add_argument("--interval", type=float, default=SNAPSHOT_INTERVAL, help="快照间隔 (秒)")
+    args = parser.parse_args(argv)
+
+    if args.mode != "play":
+        # 导入游戏模块不会初始化显示，这里设置的驱动在之后的初始化中生效
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    replayer = Replayer(session.load_session(args.session), args.interval)
+    if os.path.exists(snapshot_path(args.session)):
+        replayer.load_snapshots(snapshot_path(args.session))
+
+    if args.mode == "fast":
+        wall_start = time.perf_counter()
+        if args.until is not None:
+            replayer.seek(args.until)
+        else:
+            replayer.run_to(replayer.session.end_step)
+        report = replayer.report()
+        report['wall_seconds'] = round(time.perf_counter() - wall_start, 3)
+        print(json.dumps(report, indent=2))
+    elif args.mode == "snapshots":
+        replayer.run_to(replayer.session.end_step)
+        replayer.save_snapshots(snapshot_path(args.session))
+        print(f"{len(replayer.snapshots)} snapshots -> {snapshot_path(args.session)}")
+    else:
+        if args.start:
+            replayer.seek(args.start)
+        asyncio.run(play_realtime(replayer, args.speed))
+        tg.pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+会话录制格式
+
+一局游戏由随机种子、固定模拟步长、游戏选项和带时间戳的按键流完全确定，
+可以据此逐步重现 (见 replay.py)。文件为 JSON Lines:
+
+    {"type": "session", "version": 1, "seed": ..., "step": ..., "options": {...}, "started": ...}
+    [模拟步序号, 字符, 到达时间]        每次按键一行，按模拟步顺序
+    {"type": "end", "step": ..., ...}     正常结束时写入，附带结束时的统计
+"""
+import json
+import time
+
+FORMAT_VERSION = 1
+
+
+class SessionRecorder:
+    """边玩边写入会话文件"""
+
+    def __init__(self, path, seed, step, options=None):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        header = {'type': 'session', 'version': FORMAT_VERSION, 'seed': seed, 'step': step,
+                  'options': options or {}, 'started': time.time()}
+        self.file.write(json.dumps(header) + '\n')
+
+    def key(self, step_index, char, arrival):
+        self.file.write(json.dumps([step_index, char, arrival]) + '\n')
+
+    def close(self, end_step, summary=None):
+        if self.file.closed:
+            return
+        self.file.write(json.dumps({'type': 'end', 'step': end_step, **(summary or {})}) + '\n')
+        self.file.close()
+
+
+class Session:
+    """读入内存的会话记录"""
+
+    def __init__(self, header, keys, end):
+        self.header = header
+        self.keys = keys  # [(模拟步序号, 字符, 到达时间), ...]
+        self.end = end
+
+    @property
+    def seed(self):
+        return self.header['seed']
+
+    @property
+    def step(self):
+        return self.header['step']
+
+    @property
+    def options(self):
+        return self.header.get('options', {})
+
+    @property
+    def end_step(self):
+        """记录的最后一步；没有结束行 (例如程序崩溃) 时取最后一次按键所在的步"""
+        if self.end:
+            return self.end['step']
+        return self.keys[-1][0] if self.keys else 0
+
+
+def load_session(path):
+    keys = []
+    end = None
+    with open(path, encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('type') != 'session' or header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path}: 不支持的会话文件")
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, dict):
+                end = entry
+            else:
+                keys.append((entry[0], entry[1], entry[2]))
+    return Session(header, keys, end)
@@ -1,18 +1,34 @@
-import asyncio
-import platform
-import pygame
-import sys
-import random
 import time
-import math
+
+# 启动计时从导入 pygame、numpy 等包之前开始，这部分耗时单独记为 packages 阶段
+_module_start = time.perf_counter()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import csv  # noqa: E402
+import heapq  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import platform  # noqa: E402
+import pygame  # noqa: E402
+import sys  # noqa: E402
+import random  # noqa: E402
+import math  # noqa: E402
+import numpy as np  # noqa: E402
+from collections import OrderedDict, deque  # noqa: E402
+
+import adaptive  # noqa: E402
+import corpus  # noqa: E402
+import keylog  # noqa: E402
+import session  # noqa: E402
+
+_packages_loaded = time.perf_counter()
 
 # ==============================================================================
-# Pygame 初始化和全局设置
+# 全局设置 (pygame 各子系统由 app 按需初始化，导入模块时不做任何初始化)
 # ==============================================================================
-pygame.init()
-pygame.mixer.init()
 
-# 估算的字符尺寸 (用于初始化)
+# 估算的字符尺寸 (字体加载前使用)
 CHAR_WIDTH_ESTIMATE = 12
 CHAR_HEIGHT_ESTIMATE = 22
 
@@ -20,13 +36,26 @@ CHAR_HEIGHT_ESTIMATE = 22
 GRID_WIDTH = 80
 GRID_HEIGHT = 35
 
-# 窗口像素尺寸 (初始)
-WINDOW_PIXEL_WIDTH = GRID_WIDTH * CHAR_WIDTH_ESTIMATE
-WINDOW_PIXEL_HEIGHT = GRID_HEIGHT * CHAR_HEIGHT_ESTIMATE
+# 字符和窗口的像素尺寸，app.init_font() 按实际字体更新
+CHAR_WIDTH = CHAR_WIDTH_ESTIMATE
+CHAR_HEIGHT = CHAR_HEIGHT_ESTIMATE
+WINDOW_PIXEL_WIDTH = GRID_WIDTH * CHAR_WIDTH
+WINDOW_PIXEL_HEIGHT = GRID_HEIGHT * CHAR_HEIGHT
 
-# 创建屏幕
-screen = pygame.display.set_mode((WINDOW_PIXEL_WIDTH, WINDOW_PIXEL_HEIGHT))
-pygame.display.set_caption("Typing Defender")
+# 由 app.init_font() / app.init_display() 创建
+font = None
+screen = None
+
+GAME_FONT = "Consolas"
+FONT_CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                               'typing-defender', 'fonts.json')
+# 安装字体时会变化的目录 (字体目录本身和 fontconfig 的缓存)，用于判断“找不到字体”的缓存结果是否过时
+SYSTEM_FONT_DIRS = [os.path.expanduser(path) for path in (
+    '~/.fonts', '~/.local/share/fonts', '/usr/share/fonts', '/usr/local/share/fonts',
+    '~/.cache/fontconfig', '/var/cache/fontconfig',
+    '~/Library/Fonts', '/Library/Fonts', '/System/Library/Fonts')]
+SYSTEM_FONT_DIRS += [os.path.join(os.environ[var], *sub) for var, sub in (
+    ('WINDIR', ('Fonts',)), ('LOCALAPPDATA', ('Microsoft', 'Windows', 'Fonts'))) if var in os.environ]
 
 # ==============================================================================
 # 颜色定义 (使用更具活力的色板)
@@ -42,23 +71,399 @@ GRAY = (100, 100, 100)
 PURPLE = (220, 100, 255)
 CYAN_HIGHLIGHT = (0, 255, 255)
 
+# 固定模拟步长与调度参数
+SIMULATION_STEP = 1 / 120
+MAX_STEPS_PER_FRAME = 30  # 单帧最多追赶 0.25 秒，超出部分丢弃以免越积越多
+MAX_FRAME_SKIP = 4  # 过载时最多连续跳过的渲染帧数
+INPUT_POLL_INTERVAL = 0.002
+
+# 除字母数字外可以输入的符号 ('_' 用于代码标识符词库)
+TYPABLE_SYMBOLS = ';.,_'
+
+# 粒子池容量上限 (所有爆炸共享)
+PARTICLE_POOL_CAPACITY = 4096
+
 # ==============================================================================
-# 字体设置 (加载更具风格的字体)
+# 时钟与随机数 (可注入，便于无界面确定性模拟)
 # ==============================================================================
-font = None
-try:
-    # 尝试加载一个更具科技感的字体
-    font = pygame.font.SysFont("Consolas", CHAR_HEIGHT_ESTIMATE, bold=True)
-except pygame.error:
-    font = pygame.font.Font(None, CHAR_HEIGHT_ESTIMATE)
-
-# 获取精确的字符尺寸并重新设置窗口大小
-char_size = font.size(" ")
-CHAR_WIDTH = char_size[0] if char_size[0] > 0 else CHAR_WIDTH_ESTIMATE
-CHAR_HEIGHT = char_size[1] if char_size[1] > 0 else CHAR_HEIGHT_ESTIMATE
-WINDOW_PIXEL_WIDTH = GRID_WIDTH * CHAR_WIDTH
-WINDOW_PIXEL_HEIGHT = GRID_HEIGHT * CHAR_HEIGHT
-screen = pygame.display.set_mode((WINDOW_PIXEL_WIDTH, WINDOW_PIXEL_HEIGHT))
+
+class WallClock:
+    """真实时间时钟"""
+
+    def now(self):
+        return time.time()
+
+
+class SimulationClock:
+    """手动推进的模拟时钟，配合固定时间步长使用"""
+
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def advance(self, dt):
+        self.time += dt
+
+
+game_clock = WallClock()
+
+# 游戏逻辑专用的随机数生成器；视觉效果使用 random 模块，渲染与否不影响模拟结果
+rng = random.Random()
+
+
+def set_clock(clock):
+    global game_clock
+    game_clock = clock
+
+
+def seed_rng(seed):
+    rng.seed(seed)
+
+
+# ==============================================================================
+# 帧耗时分析
+# ==============================================================================
+PROFILER_PHASES = ('events', 'logic', 'movement', 'cleanup', 'rain', 'castle', 'objects', 'effects', 'ui', 'flip')
+
+
+class FrameProfiler:
+    """按阶段统计每帧耗时，提供滚动 p50/p95/p99 叠加层，并可逐帧写入 CSV
+
+    未开启叠加层且未写 CSV 时，每次 mark 只做一次属性判断，可以常驻在正式版本中。
+    """
+
+    def __init__(self, window=300):
+        self.samples = {phase: deque(maxlen=window) for phase in PROFILER_PHASES}
+        self.totals = deque(maxlen=window)
+        self.allocations = deque(maxlen=window)
+        self.current = dict.fromkeys(PROFILER_PHASES, 0.0)
+        self.frame_allocations_start = 0
+        self.enabled = False
+        self.show_overlay = False
+        self.csv_file = None
+        self.csv_writer = None
+        self.frame = 0
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.overlay_lines = []
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+
+    def open_csv(self, path):
+        self.csv_file = open(path, 'w', newline='', encoding='utf-8')
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_writer.writerow(('frame', 'total_ms') + tuple(f'{phase}_ms' for phase in PROFILER_PHASES)
+                                 + ('allocations',))
+
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+
+    def begin_frame(self):
+        # 开关只在帧边界生效，避免半帧数据
+        self.enabled = self.show_overlay or self.csv_writer is not None
+        if not self.enabled:
+            return
+        self.frame_allocations_start = allocation_counter.total
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        """把距上一次 mark 的耗时记到 phase 上"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[phase] += (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        total = (time.perf_counter() - self.frame_start) * 1000
+        allocations = allocation_counter.total - self.frame_allocations_start
+        current = self.current
+        for phase in PROFILER_PHASES:
+            self.samples[phase].append(current[phase])
+        self.totals.append(total)
+        self.allocations.append(allocations)
+        if self.csv_writer:
+            self.csv_writer.writerow([self.frame, f'{total:.4f}'] + [f'{current[p]:.4f}' for p in PROFILER_PHASES]
+                                     + [allocations])
+        self.current = dict.fromkeys(PROFILER_PHASES, 0.0)
+        self.frame += 1
+
+    @staticmethod
+    def percentiles(values):
+        if not values:
+            return 0.0, 0.0, 0.0
+        ordered = sorted(values)
+        last = len(ordered) - 1
+        return tuple(ordered[int(q * last)] for q in (0.5, 0.95, 0.99))
+
+    def draw_overlay(self, surface, font_to_use):
+        if not self.show_overlay:
+            return
+        # 每 30 帧重新计算一次分位数，其余帧复用缓存的文本
+        if self.frame % 30 == 0 or not self.overlay_lines:
+            lines = [f"{'phase':<9}{'p50':>7}{'p95':>7}{'p99':>7}"]
+            for phase in PROFILER_PHASES:
+                p50, p95, p99 = self.percentiles(self.samples[phase])
+                lines.append(f"{phase:<9}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+            p50, p95, p99 = self.percentiles(self.totals)
+            lines.append(f"{'total':<9}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+            p50, p95, p99 = self.percentiles(self.allocations)
+            lines.append(f"{'allocs':<9}{p50:>7}{p95:>7}{p99:>7}")
+            self.overlay_lines = lines
+
+        line_height = font_to_use.get_linesize()
+        x = surface.get_width() - font_to_use.size(self.overlay_lines[0])[0] - 10
+        for i, line in enumerate(self.overlay_lines):
+            surface.blit(glyph_cache.get(font_to_use, line, YELLOW), (x, 40 + i * line_height))
+
+
+frame_profiler = FrameProfiler()
+
+
+# ==============================================================================
+# 字形缓存、字体注册表与渲染目标
+# ==============================================================================
+
+class AllocationCounter:
+    """统计渲染路径上创建的表面和字体数量，用于确认稳态帧不做分配"""
+
+    def __init__(self):
+        self.total = 0
+        self.by_kind = {}
+
+    def add(self, kind, count=1):
+        self.total += count
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + count
+
+
+allocation_counter = AllocationCounter()
+
+
+class GlyphCache:
+    """按 (字体, 文本, 颜色, 透明度) 缓存渲染好的文本表面，LRU 淘汰"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, font_to_use, text, color, alpha=None):
+        key = (font_to_use, text, tuple(color), alpha)
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        allocation_counter.add('glyph')
+        surf = font_to_use.render(text, True, color)
+        if alpha is not None:
+            surf.set_alpha(alpha)
+        self.entries[key] = surf
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+glyph_cache = GlyphCache()
+
+
+class FontPathCache:
+    """把 SysFont 的查找结果 (字体文件路径、是否需要模拟粗体) 保存到磁盘
+
+    SysFont 首次调用时要扫描系统字体，在部分机器上需要数秒；缓存命中时直接按路径加载。
+    路径为 None 表示没找到、使用 pygame 内置字体；这种结果同时记下系统字体目录的签名，
+    之后安装了字体 (签名变化) 就重新查找。缓存的文件不存在时也重新查找。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = None
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2)
+        except OSError:
+            pass  # 缓存目录不可写时只是下次仍需扫描
+
+    @staticmethod
+    def system_fonts_signature():
+        """系统字体目录的最新修改时间"""
+        mtimes = []
+        for path in SYSTEM_FONT_DIRS:
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except OSError:
+                pass
+        return max(mtimes, default=0.0)
+
+    def _stale(self, entry):
+        if entry is None:
+            return True
+        if entry['path'] is None:
+            return entry.get('fonts') != self.system_fonts_signature()
+        return not os.path.exists(entry['path'])
+
+    def resolve(self, name, bold=False):
+        """返回 (字体文件路径, 是否模拟粗体)"""
+        if self.entries is None:
+            self._load()
+        key = f"{name}|{'bold' if bold else 'regular'}"
+        entry = self.entries.get(key)
+        if self._stale(entry):
+            # 借用 SysFont 的查找逻辑，只记录结果，不创建字体
+            path, set_bold = pygame.font.SysFont(name, 1, bold=bold,
+                                                 constructor=lambda path, size, b, i: (path, b))
+            entry = self.entries[key] = {'path': path, 'set_bold': set_bold}
+            if path is None:
+                entry['fonts'] = self.system_fonts_signature()
+            self._save()
+        return entry['path'], entry['set_bold']
+
+    def load(self, name, size, bold=False):
+        path, set_bold = self.resolve(name, bold)
+        font_obj = pygame.font.Font(path, size)
+        if set_bold:
+            font_obj.set_bold(True)
+        return font_obj
+
+
+font_paths = FontPathCache(FONT_CACHE_PATH)
+
+
+class FontRegistry:
+    """按 (名称, 字号, 粗体) 缓存字体对象，避免每帧查找和加载字体"""
+
+    def __init__(self):
+        self.fonts = {}
+
+    def get(self, name, size, bold=False):
+        key = (name, size, bold)
+        font_obj = self.fonts.get(key)
+        if font_obj is None:
+            try:
+                font_obj = font_paths.load(name, size, bold=bold)
+            except (pygame.error, OSError):
+                font_obj = pygame.font.Font(None, size)
+            allocation_counter.add('font')
+            self.fonts[key] = font_obj
+        return font_obj
+
+
+font_registry = FontRegistry()
+
+
+class RenderTargets:
+    """跨帧复用的离屏表面，只在窗口尺寸变化时重建"""
+
+    def __init__(self):
+        self.size = None
+        self.scene = None  # 屏幕震动时先画到这里，再整体偏移贴到屏幕
+        self.dim_overlay = None  # 游戏结束时的半透明遮罩
+
+    def ensure_size(self, size):
+        if size == self.size:
+            return
+        self.size = size
+        self.scene = pygame.Surface(size)
+        self.dim_overlay = pygame.Surface(size, pygame.SRCALPHA)
+        self.dim_overlay.fill((0, 0, 0, 180))
+        allocation_counter.add('surface', 2)
+
+
+render_targets = RenderTargets()
+
+
+class App:
+    """按需初始化 pygame 子系统，并记录启动各阶段的耗时 (毫秒)
+
+    只做模拟的工具调用 init_font() 即可得到与游戏一致的字符尺寸；
+    显示窗口在 init_display() 中按实际字体尺寸一次创建；音频在首帧显示之后才初始化。
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.audio_ready = False
+
+    def _record(self, phase, start):
+        self.phases[phase] = (time.perf_counter() - start) * 1000
+
+    def init_font(self):
+        global font, CHAR_WIDTH, CHAR_HEIGHT, WINDOW_PIXEL_WIDTH, WINDOW_PIXEL_HEIGHT
+        if font is not None:
+            return font
+        start = time.perf_counter()
+        pygame.font.init()
+        font = font_registry.get(GAME_FONT, CHAR_HEIGHT_ESTIMATE, bold=True)
+        # 获取精确的字符尺寸
+        char_size = font.size(" ")
+        CHAR_WIDTH = char_size[0] if char_size[0] > 0 else CHAR_WIDTH_ESTIMATE
+        CHAR_HEIGHT = char_size[1] if char_size[1] > 0 else CHAR_HEIGHT_ESTIMATE
+        WINDOW_PIXEL_WIDTH = GRID_WIDTH * CHAR_WIDTH
+        WINDOW_PIXEL_HEIGHT = GRID_HEIGHT * CHAR_HEIGHT
+        self._record('font', start)
+        return font
+
+    def init_display(self):
+        global screen
+        if screen is not None:
+            return screen
+        self.init_font()
+        start = time.perf_counter()
+        pygame.display.init()
+        screen = pygame.display.set_mode((WINDOW_PIXEL_WIDTH, WINDOW_PIXEL_HEIGHT))
+        pygame.display.set_caption("Typing Defender")
+        self._record('display', start)
+        return screen
+
+    def first_frame_shown(self):
+        """每帧显示后调用；第一次调用时记录启动总耗时 (从导入依赖包之前算起)，再初始化音频，并返回 True"""
+        if 'first_frame' in self.phases:
+            return False
+        self._record('first_frame', _module_start)
+        self.init_audio()
+        return True
+
+    def init_audio(self):
+        if self.audio_ready:
+            return
+        start = time.perf_counter()
+        try:
+            pygame.mixer.init()
+            self.audio_ready = True
+        except pygame.error:
+            pass  # 没有音频设备时照常运行
+        self._record('audio', start)
+
+    def startup_report(self):
+        return "startup: " + "  ".join(f"{phase}={ms:.1f}ms" for phase, ms in self.phases.items())
+
+
+app = App()
 
 
 # ==============================================================================
@@ -76,10 +481,10 @@ class ScreenShake:
     def start(self, magnitude=5, duration=0.2):
         self.magnitude = magnitude
         self.duration = duration
-        self.start_time = time.time()
+        self.start_time = game_clock.now()
 
     def get_offset(self):
-        elapsed = time.time() - self.start_time
+        elapsed = game_clock.now() - self.start_time
         if elapsed < self.duration:
             # 随着时间推移减弱震动
             current_magnitude = self.magnitude * (1 - (elapsed / self.duration))
@@ -88,72 +493,169 @@ class ScreenShake:
 
 
 class DigitalRain:
-    """创建“黑客帝国”风格的数字雨背景"""
+    """创建“黑客帝国”风格的数字雨背景
 
-    def __init__(self, width, height, char_width, char_height, font_to_use):
+    每列的头部位置保存在数组中并批量推进；拖尾预先渲染成若干条竖向字形条带，
+    每帧每列只需一次 blit，并通过 Surface.blits 一次性提交。
+    """
+
+    def __init__(self, width, height, char_width, char_height, font_to_use,
+                 trail_length=8, density=0.025, variants=16, seed=None):
         self.width = width
         self.height = height
         self.char_width = char_width
         self.char_height = char_height
         self.font = font_to_use
         self.columns = int(width / char_width)
-        self.drops = [-1 for _ in range(self.columns)]
+        self.rows = int(height / char_height) + 1
+        self.trail_length = trail_length
+        self.density = density  # 空闲列每帧重新落下的概率
         self.chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890"
+        self.rng = np.random.default_rng(seed)
+
+        # 头部所在行；超过 rows + trail_length 表示该列空闲
+        self.idle_row = self.rows + trail_length
+        self.heads = np.full(self.columns, self.idle_row, dtype=np.int32)
+        self.column_x = np.arange(self.columns, dtype=np.int32) * char_width
+        self.strips = [self._render_strip() for _ in range(variants)]
+
+    def _render_strip(self):
+        """渲染一条拖尾：顶部最暗，底部头部为亮绿色"""
+        strip = pygame.Surface((self.char_width, self.trail_length * self.char_height), pygame.SRCALPHA)
+        allocation_counter.add('surface')
+        for k in range(self.trail_length):
+            if k == self.trail_length - 1:
+                color = GREEN
+            else:
+                fade = (k + 1) / self.trail_length
+                color = tuple(int(c * fade) for c in GREEN_DARK)
+            char = self.chars[self.rng.integers(len(self.chars))]
+            strip.blit(glyph_cache.get(self.font, char, color), (0, k * self.char_height))
+        return strip
+
+    def draw(self, surface):
+        heads = self.heads
+        idle = heads >= self.idle_row
+        restart = idle & (self.rng.random(self.columns) < self.density)
+        heads[restart] = 0
+
+        visible = np.flatnonzero(heads < self.idle_row)
+        if visible.size:
+            ys = (heads[visible] - (self.trail_length - 1)) * self.char_height
+            variants = self.rng.integers(0, len(self.strips), visible.size)
+            strips = self.strips
+            surface.blits([(strips[v], (x, y)) for v, x, y in
+                           zip(variants.tolist(), self.column_x[visible].tolist(), ys.tolist())], False)
+            heads[visible] += 1
+
+
+class ParticlePool:
+    """所有爆炸共享的粒子池，位置、速度、半径、颜色索引存放在连续数组中并批量更新"""
+
+    def __init__(self, capacity=PARTICLE_POOL_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.radius = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.color_index = np.zeros(capacity, dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # 空闲槽位栈: free_slots[:free_count] 为可用槽位
+        self.free_slots = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self.free_count = capacity
+        self.palette = []
+        self.rng = np.random.default_rng(seed)
+        self.dropped = 0  # 因容量不足而被舍弃的粒子数
+
+    @property
+    def live_count(self):
+        return self.capacity - self.free_count
+
+    def _color_id(self, color):
+        color = tuple(color)
+        if color not in self.palette:
+            self.palette.append(color)
+        return self.palette.index(color)
+
+    def spawn(self, x, y, count, colors, life):
+        """在 (x, y) 生成 count 个粒子；池负载超过一半时按比例减少数量"""
+        load = self.live_count / self.capacity
+        if load > 0.5:
+            wanted = count
+            count = int(count * (1 - load) * 2)
+            self.dropped += wanted - count
+        if count > self.free_count:
+            self.dropped += count - self.free_count
+            count = self.free_count
+        if count <= 0:
+            return 0
+
+        slots = self.free_slots[self.free_count - count:self.free_count]
+        self.free_count -= count
+
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        speed = self.rng.uniform(80, 150, count)
+        self.pos[slots] = (x, y)
+        self.vel[slots, 0] = speed * np.cos(angle)
+        self.vel[slots, 1] = speed * np.sin(angle)
+        self.radius[slots] = self.rng.uniform(2, 5, count)
+        self.life[slots] = life
+        color_ids = np.array([self._color_id(c) for c in colors], dtype=np.uint8)
+        self.color_index[slots] = self.rng.choice(color_ids, count)
+        self.alive[slots] = True
+        return count
+
+    def update(self, dt):
+        if self.free_count == self.capacity:
+            return
+        # 对整个数组做一次批量更新，死亡槽位的数值无关紧要
+        self.pos += self.vel * dt
+        self.radius -= 2 * dt  # 粒子快速消失
+        self.life -= dt
+
+        dead = np.flatnonzero(self.alive & ((self.radius <= 0) | (self.life <= 0)))
+        if dead.size:
+            self.alive[dead] = False
+            self.free_slots[self.free_count:self.free_count + dead.size] = dead
+            self.free_count += dead.size
 
     def draw(self, surface):
-        for i in range(self.columns):
-            if self.drops[i] * self.char_height > self.height and random.random() > 0.975:
-                self.drops[i] = 0
+        live = np.flatnonzero(self.alive)
+        if not live.size:
+            return
+        positions = self.pos[live].astype(np.int32).tolist()
+        radii = self.radius[live].astype(np.int32).tolist()
+        palette = self.palette
+        for pos, radius, color_id in zip(positions, radii, self.color_index[live].tolist()):
+            pygame.draw.circle(surface, palette[color_id], pos, radius)
 
-            if self.drops[i] != -1:
-                y = self.drops[i] * self.char_height
-                char = random.choice(self.chars)
-                # 头部使用亮绿色
-                text_surface = self.font.render(char, True, GREEN)
-                surface.blit(text_surface, (i * self.char_width, y))
+    def clear(self):
+        self.alive[:] = False
+        self.free_slots[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self.free_count = self.capacity
 
-                # 尾部使用深绿色
-                if y > self.char_height * 2:
-                    prev_char = random.choice(self.chars)
-                    text_surface_dark = self.font.render(prev_char, True, GREEN_DARK)
-                    surface.blit(text_surface_dark, (i * self.char_width, y - self.char_height))
 
-                self.drops[i] += 1
+particle_pool = ParticlePool()
 
 
 class Explosion:
-    """增强的爆炸效果，包含粒子和冲击波"""
+    """增强的爆炸效果：冲击波由自身绘制，粒子交给共享的粒子池"""
 
     def __init__(self, x, y, color=YELLOW):
         self.x = x
         self.y = y
-        self.start_time = time.time()
+        self.start_time = game_clock.now()
         self.duration = 0.5
-        self.particles = []
         self.shockwave_radius = 0
         self.shockwave_max_radius = 60
         self.shockwave_color = color
 
-        for _ in range(random.randint(20, 30)):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(80, 150)
-            self.particles.append({
-                'pos': [self.x, self.y],
-                'vel': [speed * math.cos(angle), speed * math.sin(angle)],
-                'radius': random.uniform(2, 5),
-                'color': random.choice([color, RED, WHITE])
-            })
+        particle_pool.spawn(x, y, random.randint(20, 30), (color, RED, WHITE), self.duration)
 
     def update(self, dt):
-        for p in self.particles:
-            p['pos'][0] += p['vel'][0] * dt
-            p['pos'][1] += p['vel'][1] * dt
-            p['radius'] -= 2 * dt  # 粒子快速消失
-        self.particles = [p for p in self.particles if p['radius'] > 0]
-
-        # 更新冲击波
+        # 更新冲击波 (粒子由 particle_pool.update 统一更新)
         self.shockwave_radius += 200 * dt
-        return time.time() - self.start_time < self.duration
+        return game_clock.now() - self.start_time < self.duration
 
     def draw(self, surface):
         # 绘制冲击波
@@ -162,10 +664,6 @@ class Explosion:
             pygame.draw.circle(surface, self.shockwave_color + (alpha,), (self.x, self.y), int(self.shockwave_radius),
                                2)
 
-        # 绘制粒子
-        for p in self.particles:
-            pygame.draw.circle(surface, p['color'], [int(c) for c in p['pos']], int(p['radius']))
-
 
 class Laser:
     """从城堡发射的激光效果"""
@@ -173,14 +671,14 @@ class Laser:
     def __init__(self, start_pos, end_pos):
         self.start_pos = start_pos
         self.end_pos = end_pos
-        self.start_time = time.time()
+        self.start_time = game_clock.now()
         self.duration = 0.2
 
     def is_active(self):
-        return time.time() - self.start_time < self.duration
+        return game_clock.now() - self.start_time < self.duration
 
     def draw(self, surface):
-        elapsed = time.time() - self.start_time
+        elapsed = game_clock.now() - self.start_time
         alpha = max(0, 255 * (1 - elapsed / self.duration))
         color = (*CYAN_HIGHLIGHT, alpha)
 
@@ -195,14 +693,13 @@ class Laser:
 def draw_text_glow(surface, text, pos, font_to_use, color=WHITE, glow_color=GREEN):
     """绘制带有辉光效果的文本"""
     # 辉光
-    text_surf_glow = font_to_use.render(text, True, glow_color)
-    text_surf_glow.set_alpha(100)
+    text_surf_glow = glyph_cache.get(font_to_use, text, glow_color, 100)
     surface.blit(text_surf_glow, (pos[0] - 1, pos[1] - 1))
     surface.blit(text_surf_glow, (pos[0] + 1, pos[1] - 1))
     surface.blit(text_surf_glow, (pos[0] - 1, pos[1] + 1))
     surface.blit(text_surf_glow, (pos[0] + 1, pos[1] + 1))
     # 主文本
-    text_surf = font_to_use.render(text, True, color)
+    text_surf = glyph_cache.get(font_to_use, text, color)
     surface.blit(text_surf, pos)
 
 
@@ -210,26 +707,67 @@ def draw_text_glow(surface, text, pos, font_to_use, color=WHITE, glow_color=GREE
 # 游戏核心类
 # ==============================================================================
 class FallingObject:
-    def __init__(self, text, speed_grid_per_sec=0.5, is_bonus=False):
+    # 加入 FallingObjectStore 后，y 坐标和活动标志存放在存储的数组中
+    __slots__ = ('id', 'text', 'is_bonus', 'speed_pixel_per_sec', 'pixel_x', 'progress', 'store', 'slot',
+                 '_y', '_active')
+
+    def __init__(self, text, speed_grid_per_sec=0.5, is_bonus=False, object_id=0):
+        self.id = object_id
         self.text = text.upper()
         self.is_bonus = is_bonus
         self.speed_pixel_per_sec = speed_grid_per_sec * CHAR_HEIGHT
-        self.pixel_y_float = 0.0
-        self.pixel_x = random.randint(0, max(0, GRID_WIDTH - len(text))) * CHAR_WIDTH
-        self.active = True
+        self.pixel_x = rng.randint(0, max(0, GRID_WIDTH - len(text))) * CHAR_WIDTH
         self.progress = 0
+        self.store = None
+        self.slot = -1
+        self._y = 0.0
+        self._active = True
+
+    @property
+    def pixel_y_float(self):
+        if self.store is not None:
+            return self.store.y[self.slot]
+        return self._y
+
+    @pixel_y_float.setter
+    def pixel_y_float(self, value):
+        if self.store is not None:
+            self.store.y[self.slot] = value
+        else:
+            self._y = value
+
+    @property
+    def render_y(self):
+        """渲染用的插值 y 坐标"""
+        if self.store is not None:
+            return self.store.render_y[self.slot]
+        return self._y
+
+    @property
+    def active(self):
+        if self.store is not None:
+            return bool(self.store.active[self.slot])
+        return self._active
+
+    @active.setter
+    def active(self, value):
+        if self.store is not None:
+            self.store.active[self.slot] = value
+        else:
+            self._active = value
 
     def draw(self, surface, font_to_use):
         if not self.active: return
 
         glow = YELLOW if self.is_bonus else GREEN
-        draw_text_glow(surface, self.text, (self.pixel_x, self.pixel_y_float), font_to_use, WHITE, glow)
+        y = self.render_y
+        draw_text_glow(surface, self.text, (self.pixel_x, y), font_to_use, WHITE, glow)
 
         # 绘制已输入部分
         if self.progress > 0:
             inputted_text = self.text[:self.progress]
-            input_surface = font_to_use.render(inputted_text, True, CYAN_HIGHLIGHT)
-            surface.blit(input_surface, (self.pixel_x, int(self.pixel_y_float)))
+            input_surface = glyph_cache.get(font_to_use, inputted_text, CYAN_HIGHLIGHT)
+            surface.blit(input_surface, (self.pixel_x, int(y)))
 
     def move(self, dt):
         if self.active:
@@ -256,6 +794,198 @@ class FallingObject:
         return center_x, center_y
 
 
+class FallingObjectStore:
+    """下落对象的结构数组存储
+
+    y、速度、x 和活动标志保存在连续的 NumPy 数组中，移动用一次批量运算完成；
+    失效对象通过与末尾槽位交换来删除，不必每帧复制整个列表。
+
+    另外按所在网格行 (y 坐标所在的行，0..GRID_HEIGHT) 对对象分桶。对象匀速下落，
+    进入下一行的时刻可以预先算出，放进按时间排序的堆里，到时才把对象移到下一个桶，
+    所以维护分桶不需要每帧扫描全部对象。城堡碰撞只检查城堡顶部附近几行的桶。
+    (游戏画面就是整个下落区域，任何一行都可能可见，所以渲染直接遍历全部对象，不按行剔除。)
+    对象的位置只应通过 move() 改变，否则分桶会过时。
+    """
+
+    def __init__(self, capacity=64):
+        self.objects = []  # 槽位 -> FallingObject，始终紧凑排列
+        self.rows = [{} for _ in range(GRID_HEIGHT + 1)]  # 行 -> {FallingObject: None}，保持加入顺序
+        self.row_of = {}  # FallingObject -> 所在行
+        self.crossings = []  # 堆: (进入下一行的时刻, 序号, FallingObject)
+        self.elapsed = 0.0  # 本存储内累计的移动时间
+        self.sequence = 0
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.prev_y = np.zeros(capacity, dtype=np.float64)  # 上一模拟步的 y，用于渲染插值
+        self.render_y = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def _grow(self):
+        capacity = len(self.y) * 2
+        for name in ('y', 'prev_y', 'render_y', 'speed', 'x', 'active'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def append(self, obj):
+        slot = len(self.objects)
+        if slot == len(self.y):
+            self._grow()
+        self.y[slot] = self.prev_y[slot] = self.render_y[slot] = obj._y
+        self.speed[slot] = obj.speed_pixel_per_sec
+        self.x[slot] = obj.pixel_x
+        self.active[slot] = obj._active
+        obj.store = self
+        obj.slot = slot
+        self.objects.append(obj)
+        row = self.row_for(obj._y)
+        self.rows[row][obj] = None
+        self.row_of[obj] = row
+        self._schedule_crossing(obj, row, obj._y)
+
+    @staticmethod
+    def row_for(y):
+        return min(max(int(y // CHAR_HEIGHT), 0), GRID_HEIGHT)
+
+    def _schedule_crossing(self, obj, row, y):
+        speed = obj.speed_pixel_per_sec
+        if speed > 0 and row < GRID_HEIGHT:
+            self.sequence += 1
+            when = self.elapsed + ((row + 1) * CHAR_HEIGHT - y) / speed
+            if when <= self.elapsed:
+                # 浮点误差使对象停在行边界前一点点时，推迟到下一次 move，避免原地反复重排
+                when = math.nextafter(self.elapsed, math.inf)
+            heapq.heappush(self.crossings, (when, self.sequence, obj))
+
+    def move(self, dt):
+        count = len(self.objects)
+        self.prev_y[:count] = self.y[:count]
+        self.y[:count] += self.speed[:count] * dt * self.active[:count]
+        self.elapsed += dt
+
+        # 只处理到时跨行的对象
+        crossings = self.crossings
+        while crossings and crossings[0][0] <= self.elapsed:
+            obj = heapq.heappop(crossings)[2]
+            if obj.store is not self or not self.active[obj.slot]:
+                continue  # 已删除或已失效，失效对象的桶在 remove_inactive 中清理
+            y = float(self.y[obj.slot])
+            row = self.row_for(y)
+            old_row = self.row_of[obj]
+            if row != old_row:
+                del self.rows[old_row][obj]
+                self.rows[row][obj] = None
+                self.row_of[obj] = row
+            self._schedule_crossing(obj, row, y)
+
+    def in_rows(self, first_row, last_row):
+        """依次产出第 first_row 到 last_row 行 (含) 桶中的对象"""
+        for row in range(max(first_row, 0), min(last_row, GRID_HEIGHT) + 1):
+            yield from self.rows[row]
+
+    def interpolate(self, alpha):
+        """计算 prev_y 与 y 之间的渲染位置，alpha 为距上一模拟步的比例"""
+        count = len(self.objects)
+        prev_y = self.prev_y[:count]
+        np.add(prev_y, (self.y[:count] - prev_y) * alpha, out=self.render_y[:count])
+
+    def collide(self, limit_y, column_limits=None):
+        """返回底部到达 limit_y 的活动对象，并将它们标记为失效
+
+        column_limits 给出时为每个网格列各自的界限 (limit_y 为其中的最小值)，对象按所覆盖列中最高的界限判断。
+        只检查 y 可能达到 limit_y - CHAR_HEIGHT 的行 (为浮点误差多留一行)，结果按槽位排序
+        """
+        y, active = self.y, self.active
+        threshold = limit_y - CHAR_HEIGHT
+        hit = []
+        for obj in self.in_rows(int(threshold // CHAR_HEIGHT) - 1, GRID_HEIGHT):
+            if not active[obj.slot] or y[obj.slot] < threshold:
+                continue
+            if column_limits is not None:
+                first_col = obj.pixel_x // CHAR_WIDTH
+                if y[obj.slot] + CHAR_HEIGHT < column_limits[first_col:first_col + len(obj.text)].min():
+                    continue
+            hit.append(obj)
+        if not hit:
+            return []
+        hit.sort(key=lambda obj: obj.slot)
+        for obj in hit:
+            active[obj.slot] = False
+        return hit
+
+    def remove_inactive(self):
+        """与末尾槽位交换删除失效对象，被删除的对象保留最后的位置"""
+        count = len(self.objects)
+        dead = np.flatnonzero(~self.active[:count])
+        objects = self.objects
+        for slot in reversed(dead.tolist()):
+            obj = objects[slot]
+            del self.rows[self.row_of.pop(obj)][obj]
+            obj._y = float(self.y[slot])
+            obj._active = False
+            obj.store = None
+            last = len(objects) - 1
+            if slot != last:
+                moved = objects[last]
+                objects[slot] = moved
+                moved.slot = slot
+                self.y[slot] = self.y[last]
+                self.prev_y[slot] = self.prev_y[last]
+                self.render_y[slot] = self.render_y[last]
+                self.speed[slot] = self.speed[last]
+                self.x[slot] = self.x[last]
+                self.active[slot] = self.active[last]
+            objects.pop()
+
+
+class TargetIndex:
+    """按首字母索引下落对象，用于快速锁定目标
+
+    同一速度的对象都从 y=0 出发并以相同步长移动，所以按生成顺序排列时，
+    越早生成的越靠下。每个首字母下按速度分组，每组是一个按生成顺序的队列，
+    队首即该组最靠下的对象；查找时只需比较各组队首。
+    已失效的对象不立即删除，而是在到达队首时惰性清除。
+    """
+
+    def __init__(self):
+        self.buckets = {}  # 首字母 -> {速度: deque[FallingObject]}
+
+    def add(self, obj):
+        groups = self.buckets.setdefault(obj.text[0], {})
+        groups.setdefault(obj.speed_pixel_per_sec, deque()).append(obj)
+
+    def lowest(self, first_char):
+        """返回以 first_char 开头、仍然活动且最靠下的对象，没有则返回 None"""
+        groups = self.buckets.get(first_char)
+        if not groups:
+            return None
+
+        best_match = None
+        for speed in list(groups):
+            group = groups[speed]
+            while group and not group[0].active:
+                group.popleft()
+            if not group:
+                del groups[speed]
+                continue
+            obj = group[0]
+            if (not best_match or obj.pixel_y_float > best_match.pixel_y_float
+                    or (obj.pixel_y_float == best_match.pixel_y_float and obj.id < best_match.id)):
+                best_match = obj
+        return best_match
+
+    def clear(self):
+        self.buckets.clear()
+
+
 # ==============================================================================
 # 难度和城堡设置
 # ==============================================================================
@@ -290,8 +1020,7 @@ initial_castle_art = [
     "##======================================================================##",
     "##########################################################################"
 ]
-castle_art = []
-core_position_grid = None  # (行, 列) in castle_art
+core_position_grid = None  # (行, 列) in initial_castle_art
 
 
 def find_core_position():
@@ -306,212 +1035,659 @@ def find_core_position():
 
 find_core_position()
 
+# 城堡各种字符的耐久，其余非空字符为 1
+CELL_HEALTH = {'#': 3, '=': 2, CORE_CHAR: 4}  # 核心暴露后还能再挨一次正面撞击
+IMPACT_RADIUS = 3  # 撞击波及的列数 (单词两侧) 和深度
+IMPACT_DAMAGE = 3  # 撞击中心的伤害，每远一格减 1，最少 1
+
+
+class Castle:
+    """可逐格破坏的城堡
+
+    health[r, c] 为每格的耐久 (0 表示空)，由 initial_castle_art 推出；surface[c] 为第 c 列最上面
+    的完好格所在的行 (整列被毁时为 rows)，surface_y[c] 为对应的屏幕像素 y，城堡以外的列为窗口底部。
+    每次撞击只修改撞击点附近的一小块格子，只重新计算这些列的表面，并把变化的格子记入 dirty，
+    渲染器据此只重绘这些格子。核心的耐久降为 0 时城堡被毁。
+    """
+
+    def __init__(self, art, core=None):
+        self.rows = len(art)
+        self.cols = max((len(line) for line in art), default=0)
+        self.top_row = GRID_HEIGHT - self.rows  # 城堡顶部所在的屏幕行
+        self.chars = [line.ljust(self.cols) for line in art]
+        self.health = np.zeros((self.rows, self.cols), dtype=np.int8)
+        for r, line in enumerate(self.chars):
+            for c, char in enumerate(line):
+                if char != ' ':
+                    self.health[r, c] = CELL_HEALTH.get(char, 1)
+        self.max_health = self.health.copy()
+        self.core = core
+        self.surface = np.full(self.cols, self.rows, dtype=np.int32)
+        self.surface_y = np.full(max(GRID_WIDTH, self.cols), float(GRID_HEIGHT * CHAR_HEIGHT))
+        self.dirty = set()  # 变化过、尚未重绘的格子 (行, 列)
+        self.destroyed = False
+        self._refresh_columns(0, self.cols)
+
+    def _refresh_columns(self, lo, hi):
+        intact = self.health[:, lo:hi] > 0
+        surface = self.surface[lo:hi]
+        surface[:] = intact.argmax(axis=0)
+        surface[~intact.any(axis=0)] = self.rows
+        np.multiply(surface + self.top_row, CHAR_HEIGHT, out=self.surface_y[lo:hi])
+        self.min_surface_y = float(self.surface_y.min())
+
+    @property
+    def core_exposed(self):
+        """核心所在列上方已无完好格"""
+        return self.core is not None and self.surface[self.core[1]] >= self.core[0]
+
+    _kernels = {}  # (宽度, 半径, 伤害) -> 伤害核
+
+    @classmethod
+    def blast_kernel(cls, width, radius, damage):
+        """宽 width 列的撞击在 (radius + 1) x (width + 2 * radius) 范围内造成的伤害，按参数缓存
+
+        伤害随到撞击区域的切比雪夫距离递减：列方向相对单词覆盖的列，行方向相对撞击的表面行
+        """
+        key = (width, radius, damage)
+        kernel = cls._kernels.get(key)
+        if kernel is None:
+            cols = np.arange(width + 2 * radius)
+            col_distance = np.maximum(0, np.maximum(radius - cols, cols - (radius + width - 1)))
+            distance = np.maximum(np.arange(radius + 1)[:, None], col_distance[None, :])
+            kernel = cls._kernels[key] = np.maximum(1, damage - distance).astype(np.int8)
+        return kernel
+
+    def covers(self, first_col, last_col):
+        """第 first_col..last_col 列中是否还有完好的格子；否则落在这里的对象掉到地面上"""
+        lo, hi = max(first_col, 0), min(last_col + 1, self.cols)
+        return lo < hi and int(self.surface[lo:hi].min()) < self.rows
+
+    def impact(self, first_col, last_col, radius=IMPACT_RADIUS, damage=IMPACT_DAMAGE):
+        """对象在第 first_col..last_col 列落下；返回是否撞到了城堡 (核心被毁时 destroyed 置位)
+
+        核心在暴露 (所在列上方已无完好格) 之前不受伤害，要先把它上方的城墙打穿
+        """
+        if not self.covers(first_col, last_col):
+            return False  # 落在城堡旁边或已被打穿的列上
+        lo, hi = max(first_col, 0), min(last_col + 1, self.cols)
+        top = int(self.surface[lo:hi].min())
+        r1 = min(top + radius + 1, self.rows)
+        c0, c1 = max(lo - radius, 0), min(hi + radius, self.cols)
+        kernel = self.blast_kernel(hi - lo, radius, damage)[:r1 - top, c0 - (lo - radius):c1 - (lo - radius)]
+        window = self.health[top:r1, c0:c1]
+        damaged = window - kernel
+        np.maximum(damaged, 0, out=damaged)
+        if self.core is not None and not self.core_exposed:
+            core_r, core_c = self.core[0] - top, self.core[1] - c0
+            if 0 <= core_r < r1 - top and 0 <= core_c < c1 - c0:
+                damaged[core_r, core_c] = window[core_r, core_c]
+        changed = np.nonzero(damaged != window)
+        if changed[0].size:
+            window[...] = damaged
+            self.dirty.update(zip((changed[0] + top).tolist(), (changed[1] + c0).tolist()))
+            self._refresh_columns(c0, c1)
+            if self.core is not None and self.health[self.core] == 0:
+                self.destroyed = True
+        return True
+
+    def damaged_cells(self):
+        """与初始状态不同的格子 [(行, 列, 耐久), ...]"""
+        rows, cols = np.nonzero(self.health != self.max_health)
+        return [(r, c, int(self.health[r, c])) for r, c in zip(rows.tolist(), cols.tolist())]
+
+    def apply_cells(self, cells):
+        """直接设置若干格子的耐久 (多人模式的客户端按服务器同步)"""
+        if not cells:
+            return
+        for r, c, value in cells:
+            self.health[r, c] = value
+            self.dirty.add((r, c))
+        columns = [c for _, c, _ in cells]
+        self._refresh_columns(min(columns), max(columns) + 1)
+        if self.core is not None and self.health[self.core] == 0:
+            self.destroyed = True
+
+    def take_dirty(self):
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
+
+
+# 可选的大型词库 (见 corpus.py)，为单词关卡供词
+word_corpus = None
+corpus_charsets = tuple(corpus.CHARSET_NAMES.values())
+
+
+def load_corpus(path, charsets=None):
+    """加载词库；charsets 为 'letters'/'alnum'/'code' 名称列表，默认全部"""
+    global word_corpus, corpus_charsets
+    word_corpus = corpus.WordCorpus(path)
+    if charsets:
+        corpus_charsets = tuple(corpus.CHARSET_NAMES[name] for name in charsets)
+    return word_corpus
+
+
+def pick_item(level_settings, adaptive_engine=None):
+    """选取下一个生成的文本：单词关卡优先从词库抽取，否则使用关卡自带的 items；
+    开启自适应难度时按玩家的弱键加权"""
+    level = level_settings['level']
+    if (word_corpus is not None and level >= corpus.FIRST_WORD_LEVEL
+            and word_corpus.count(level, corpus_charsets)):
+        def sample_word():
+            return word_corpus.sample(level, corpus_charsets, rng)
+
+        if adaptive_engine:
+            return adaptive_engine.choose_item(level_settings, rng, sample_word)
+        return sample_word()
+    if adaptive_engine:
+        return adaptive_engine.choose_item(level_settings, rng)
+    return rng.choice(level_settings['items'])
+
+
+class CastleRenderer:
+    """将城堡预渲染为一张表面，换了新城堡时整体重建，受损时只重绘变化的格子；闪烁的核心单独叠加"""
+
+    def __init__(self, font_to_use, char_width, char_height):
+        self.font = font_to_use
+        self.char_width = char_width
+        self.char_height = char_height
+        self.surface = None
+        self.castle = None
+        self.core_offset = None  # 核心在城堡表面内的像素位置
+        # 计时统计 (毫秒)
+        self.rebuilds = 0
+        self.cell_redraws = 0
+        self.frames = 0
+        self.total_draw_ms = 0.0
+
+    def draw_cell(self, castle, r, c):
+        char = castle.chars[r][c]
+        if char == ' ' or char == CORE_CHAR:
+            return
+        pos = (c * self.char_width, r * self.char_height)
+        self.surface.fill((0, 0, 0, 0), (pos[0], pos[1], self.char_width, self.char_height))
+        health = int(castle.health[r, c])
+        if health:
+            # 受损的格子变暗，耐久只有几级，颜色种类有限，便于缓存
+            base = BLUE if char in '#=' else GRAY
+            shade = 0.4 + 0.6 * health / int(castle.max_health[r, c])
+            self.surface.blit(glyph_cache.get(self.font, char, tuple(int(v * shade) for v in base)), pos)
+
+    def rebuild(self, castle):
+        self.surface = pygame.Surface((max(1, castle.cols * self.char_width), max(1, castle.rows * self.char_height)),
+                                      pygame.SRCALPHA)
+        allocation_counter.add('surface')
+        self.core_offset = None
+        if castle.core is not None:
+            self.core_offset = (castle.core[1] * self.char_width, castle.core[0] * self.char_height)
+        for r in range(castle.rows):
+            for c in range(castle.cols):
+                self.draw_cell(castle, r, c)
+        castle.take_dirty()
+        self.castle = castle
+        self.rebuilds += 1
+
+    def draw(self, surface, castle, top_y):
+        start = time.perf_counter()
+        if self.surface is None or castle is not self.castle:
+            self.rebuild(castle)
+        elif castle.dirty:
+            for r, c in castle.take_dirty():
+                self.draw_cell(castle, r, c)
+                self.cell_redraws += 1
+        surface.blit(self.surface, (0, top_y))
+
+        if self.core_offset and not castle.destroyed:
+            # 让核心闪烁 (量化为 16 级，便于缓存)；暴露后变为红色
+            pulse = round((math.sin(game_clock.now() * 5) + 1) / 2 * 15) / 15
+            color = tuple(int(c * (0.5 + pulse * 0.5)) for c in (RED if castle.core_exposed else PURPLE))
+            core_surf = glyph_cache.get(self.font, CORE_CHAR, color)
+            surface.blit(core_surf, (self.core_offset[0], top_y + self.core_offset[1]))
+
+        self.total_draw_ms += (time.perf_counter() - start) * 1000
+        self.frames += 1
+
+    def average_draw_ms(self):
+        return self.total_draw_ms / self.frames if self.frames else 0.0
+
+
+# ==============================================================================
+# 游戏逻辑
+# ==============================================================================
+def new_game_state(levels=None):
+    """返回一局新游戏的状态；levels 可替换 difficulty_levels，用于调参"""
+    return {
+        'levels': levels or difficulty_levels, 'castle': Castle(initial_castle_art, core_position_grid),
+        'falling_objects': FallingObjectStore(), 'current_target': None, 'score': 0,
+        'current_level': 1, 'game_over': False, 'last_generate_time': game_clock.now(),
+        'explosions': [], 'lasers': [], 'level_up_timer': 0,
+        'screen_shake': ScreenShake(), 'target_index': TargetIndex(), 'keylog': None, 'adaptive': None,
+        'stats': {'spawned': 0, 'killed': 0, 'castle_hits': 0, 'keystrokes': 0}
+    }
+
+
+def core_screen_position(game_state):
+    castle = game_state['castle']
+    return ((castle.core[1] + 0.5) * CHAR_WIDTH, (castle.top_row + castle.core[0] + 0.5) * CHAR_HEIGHT)
+
+
+def find_target(game_state, typed_char):
+    """寻找以 typed_char 开头且最靠下的对象"""
+    return game_state['target_index'].lowest(typed_char.upper())
+
+
+def destroy_target(game_state, obj, points):
+    game_state['score'] += points
+    game_state['stats']['killed'] += 1
+    game_state['lasers'].append(Laser(core_screen_position(game_state), obj.get_center_position()))
+    game_state['current_target'] = None
+
+
+def handle_keystroke(game_state, typed_char, timestamp=None):
+    """处理一次按键输入；timestamp 为按键到达时间，默认取当前游戏时间"""
+    if not (typed_char and (typed_char.isalnum() or typed_char in TYPABLE_SYMBOLS)):
+        return
+    if game_state['game_over']:
+        return  # 结束的那一步之后排队的按键不再计分，回放在同一步停止
+    game_state['stats']['keystrokes'] += 1
+    hit = reset = complete = False
+    target_id = 0
+    expected = None  # 当前目标期望的下一个字符，统计记在这个键上而不是实际按下的键
+
+    if game_state['current_target']:
+        target = game_state['current_target']
+        target_id = target.id
+        expected = target.text[target.progress]
+        if target.handle_input(typed_char):
+            # 单词完成
+            hit = complete = True
+            points = len(target.text) * 10
+            destroy_target(game_state, target, points * 2 if target.is_bonus else points)
+        elif target.progress == 0:
+            reset = True
+            game_state['current_target'] = None  # 输入错误，取消目标
+        else:
+            hit = True
+
+    if not game_state['current_target']:
+        # 寻找新目标
+        best_match = find_target(game_state, typed_char)
+        if best_match:
+            hit = True
+            target_id = best_match.id
+            game_state['current_target'] = best_match
+            if best_match.handle_input(typed_char):  # 单字母单词
+                complete = True
+                destroy_target(game_state, best_match, len(best_match.text) * 10)
+
+    # 有目标时按期望的键记录是否按对 (按错后锁定了新目标也算错)；没有目标时只能记在按下的键上
+    if expected is not None:
+        key, key_hit = expected, typed_char.upper() == expected
+    else:
+        key, key_hit = typed_char.upper(), hit
+    if game_state['adaptive']:
+        game_state['adaptive'].record(key, key_hit, game_clock.now() if timestamp is None else timestamp)
+    if game_state['keylog']:
+        game_state['keylog'].record(game_clock.now() if timestamp is None else timestamp, key,
+                                    target_id, key_hit, reset, complete)
+
+
+def update_game(game_state, dt):
+    """推进一步游戏逻辑：升级、生成、移动、碰撞和清理"""
+    if game_state['game_over']:
+        return
+
+    # 升级检查
+    old_level = game_state['current_level']
+    levels = game_state['levels']
+    level_settings = levels[min(len(levels) - 1, game_state['current_level'] - 1)]
+    if game_state['score'] >= level_settings['score_threshold'] and game_state['current_level'] < len(levels):
+        game_state['current_level'] += 1
+    if game_state['current_level'] > old_level:
+        game_state['level_up_timer'] = game_clock.now()  # 触发升级提示
+
+    # 生成新对象
+    adaptive_engine = game_state['adaptive']
+    interval = level_settings['generate_interval']
+    if adaptive_engine:
+        interval *= adaptive_engine.interval_factor()
+    if game_clock.now() - game_state['last_generate_time'] > interval:
+        is_bonus = rng.random() < 0.1
+        item_text = pick_item(level_settings, adaptive_engine)
+        speed = level_settings['speed_grid_per_sec'] * (2.0 if is_bonus else 1.0)
+        if adaptive_engine:
+            speed *= adaptive_engine.speed_factor(item_text)
+        game_state['stats']['spawned'] += 1
+        obj = FallingObject(item_text, speed, is_bonus, game_state['stats']['spawned'])
+        game_state['falling_objects'].append(obj)
+        game_state['target_index'].add(obj)
+        game_state['last_generate_time'] = game_clock.now()
+    frame_profiler.mark('logic')
+
+    # 移动和碰撞检测：每列的城堡表面高度不同
+    castle = game_state['castle']
+    falling_objects = game_state['falling_objects']
+    falling_objects.move(dt)
+    for obj in falling_objects.collide(castle.min_surface_y, castle.surface_y):
+        if obj == game_state['current_target']:
+            game_state['current_target'] = None
+
+        # 城堡伤害：只破坏撞击点附近的格子，核心被毁时游戏结束；落在城堡旁边的对象直接消失
+        first_col = obj.pixel_x // CHAR_WIDTH
+        if not castle.impact(first_col, first_col + len(obj.text) - 1):
+            continue
+        game_state['stats']['castle_hits'] += 1
+        game_state['screen_shake'].start(magnitude=8, duration=0.3)
+        game_state['explosions'].append(Explosion(obj.get_center_position()[0], obj.get_bottom_pixel_y(), RED))
+        if castle.destroyed:
+            game_state['game_over'] = True
+    frame_profiler.mark('movement')
+
+    # 清理非活动对象
+    falling_objects.remove_inactive()
+    game_state['explosions'] = [e for e in game_state['explosions'] if e.update(dt)]
+    game_state['lasers'] = [l for l in game_state['lasers'] if l.is_active()]
+    particle_pool.update(dt)
+    frame_profiler.mark('cleanup')
+
+
+# ==============================================================================
+# 渲染
+# ==============================================================================
+def draw_game(target_surface, game_state, digital_rain, castle_renderer, alpha=1.0):
+    """将当前游戏状态绘制到 target_surface，alpha 为两次模拟步之间的插值比例"""
+    game_state['falling_objects'].interpolate(alpha)
+    render_targets.ensure_size(target_surface.get_size())
+    width, height = render_targets.size
+
+    # 不震动时直接画到目标表面；震动时画到复用的场景表面再整体偏移，无需每帧复制全屏
+    offset = game_state['screen_shake'].get_offset()
+    shaking = offset[0] != 0 or offset[1] != 0
+    render_surface = render_targets.scene if shaking else target_surface
+    frame_profiler.mark('effects')
+
+    # 绘制背景
+    render_surface.fill(BLACK)
+    digital_rain.draw(render_surface)
+    frame_profiler.mark('rain')
+
+    # 绘制城堡
+    if not game_state['game_over']:
+        castle = game_state['castle']
+        castle_renderer.draw(render_surface, castle, castle.top_row * CHAR_HEIGHT)
+    frame_profiler.mark('castle')
+
+    # 绘制游戏对象
+    for obj in game_state['falling_objects']:
+        obj.draw(render_surface, font)
+    frame_profiler.mark('objects')
+    for las in game_state['lasers']:
+        las.draw(render_surface)
+    for exp in game_state['explosions']:
+        exp.draw(render_surface)
+    particle_pool.draw(render_surface)
+    frame_profiler.mark('effects')
+
+    # 绘制UI
+    score_text = f"SCORE: {game_state['score']}  LEVEL: {game_state['current_level']}"
+    draw_text_glow(render_surface, score_text, (10, 10), font, WHITE, BLUE)
+    if game_state['current_target']:
+        pygame.draw.rect(render_surface, CYAN_HIGHLIGHT, (game_state['current_target'].pixel_x - 2,
+                                                          int(game_state['current_target'].render_y) - 2,
+                                                          len(game_state['current_target'].text) * CHAR_WIDTH + 4,
+                                                          CHAR_HEIGHT + 4), 1)
+
+    # 绘制升级提示 (透明度量化为 16 级，便于缓存)
+    if game_state['level_up_timer'] and game_clock.now() - game_state['level_up_timer'] < 1.5:
+        alpha = max(0, 255 * (1 - (game_clock.now() - game_state['level_up_timer']) / 1.5))
+        level_up_font = font_registry.get(GAME_FONT, int(CHAR_HEIGHT * 2.5), bold=True)
+        text_surf = glyph_cache.get(level_up_font, "LEVEL UP", YELLOW, int(alpha) // 16 * 16)
+        pos = (width / 2 - text_surf.get_width() / 2, height / 2 - text_surf.get_height() / 2)
+        render_surface.blit(text_surf, pos)
+    else:
+        game_state['level_up_timer'] = 0
+
+    # 应用屏幕震动
+    if shaking:
+        target_surface.fill(BLACK)
+        target_surface.blit(render_surface, offset)
+
+    # 游戏结束画面
+    if game_state['game_over']:
+        target_surface.blit(render_targets.dim_overlay, (0, 0))
+
+        large_font = font_registry.get(GAME_FONT, CHAR_HEIGHT * 3, bold=True)
+        draw_text_glow(target_surface, "SYSTEM FAILURE",
+                       (width / 2 - large_font.size("SYSTEM FAILURE")[0] / 2, height * 0.3), large_font, RED, RED)
+        draw_text_glow(target_surface, f"FINAL SCORE: {game_state['score']}",
+                       (width / 2 - font.size(f"FINAL SCORE: {game_state['score']}")[0] / 2, height * 0.5),
+                       font, WHITE, BLUE)
+        draw_text_glow(target_surface, "Press any key to disconnect...",
+                       (width / 2 - font.size("Press any key to disconnect...")[0] / 2, height * 0.7),
+                       font, GRAY, BLACK)
+
+    frame_profiler.draw_overlay(target_surface, font)
+    frame_profiler.mark('ui')
+
+
+# ==============================================================================
+# 调度
+# ==============================================================================
+class FixedStepScheduler:
+    """把真实时间折算为固定步长的模拟步数
+
+    真实时间累积到 accumulator 中，每满一个 step 推进一步模拟；
+    单帧积压超过 max_steps 时丢弃多余时间 (记入 dropped_time)，防止负载过高时越追越慢。
+    """
+
+    def __init__(self, step=SIMULATION_STEP, max_steps=MAX_STEPS_PER_FRAME):
+        self.step = step
+        self.max_steps = max_steps
+        self.origin = 0.0
+        self.last = 0.0
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+        self.skipped_frames = 0
+
+    def start(self, now):
+        self.origin = self.last = now
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    def advance(self, now):
+        """返回本帧需要执行的模拟步数"""
+        self.accumulator += now - self.last
+        self.last = now
+        steps = min(int(self.accumulator / self.step), self.max_steps)
+        self.accumulator -= steps * self.step
+        if self.accumulator >= self.step:
+            # 超出追赶上限的整步时间直接丢弃，只保留不足一步的余量
+            excess = self.accumulator - self.accumulator % self.step
+            self.dropped_time += excess
+            self.accumulator -= excess
+        return steps
+
+    @property
+    def alpha(self):
+        """渲染插值比例"""
+        return min(1.0, self.accumulator / self.step)
+
+    def to_sim_time(self, wall_time):
+        """把真实时间戳换算成模拟时间"""
+        return wall_time - self.origin - self.dropped_time
+
+
+def display_refresh_rate(default=60):
+    get_rate = getattr(pygame.display, 'get_current_refresh_rate', None)
+    rate = get_rate() if get_rate else 0
+    return rate if rate > 0 else default
+
+
+async def collect_input(input_events):
+    """独立的输入任务：高频轮询事件队列并记录到达时间，而不是每帧才读取一次"""
+    while True:
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            input_events.append((now, event))
+        await asyncio.sleep(INPUT_POLL_INTERVAL)
+
 
 # ==============================================================================
 # 游戏主函数
 # ==============================================================================
-async def run_game():
-    global castle_art
-
-    # 游戏状态
-    game_state = {
-        'falling_objects': [], 'current_target': None, 'score': 0,
-        'current_level': 1, 'game_over': False, 'last_generate_time': time.time(),
-        'explosions': [], 'lasers': [], 'level_up_timer': 0
+def session_options(game_state):
+    """重现一局游戏所需的选项，写入会话记录"""
+    return {
+        'adaptive': game_state['adaptive'] is not None,
+        'corpus': word_corpus.path if word_corpus is not None else None,
+        'corpus_charsets': [name for name, value in corpus.CHARSET_NAMES.items() if value in corpus_charsets],
     }
 
-    castle_art = list(initial_castle_art)
+
+async def run_game(profile_csv=None, show_profiler=False, keylog_path=None, adaptive_difficulty=False,
+                   seed=None, record_path=None, startup_report=False, race_address=None, player_name=None):
+    sim_clock = SimulationClock()
+    set_clock(sim_clock)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    seed_rng(seed)
+    if profile_csv:
+        frame_profiler.open_csv(profile_csv)
+    frame_profiler.show_overlay = show_profiler
+    app.init_display()
+
+    race_client = None
+    recorder = None
+    if race_address:
+        # 竞速模式：状态来自服务器，本地只做预测和显示
+        import race  # race 依赖本模块，按需导入
+        host, port = race.parse_address(race_address)
+        race_client = await race.RaceClient.connect(host, port, player_name or platform.node())
+        game_state = race_client.game_state
+        keystroke, update = race_client.handle_keystroke, race_client.update
+    else:
+        game_state = new_game_state()
+        if keylog_path:
+            game_state['keylog'] = keylog.KeystrokeLog(keylog_path)
+        if adaptive_difficulty:
+            game_state['adaptive'] = adaptive.AdaptiveEngine(game_state['levels'])
+        if record_path:
+            recorder = session.SessionRecorder(record_path, seed, SIMULATION_STEP, session_options(game_state))
+        keystroke, update = handle_keystroke, update_game
 
     # 特效对象
-    screen_shake = ScreenShake()
     digital_rain = DigitalRain(WINDOW_PIXEL_WIDTH, WINDOW_PIXEL_HEIGHT, CHAR_WIDTH, CHAR_HEIGHT, font)
-
-    clock = pygame.time.Clock()
+    castle_renderer = CastleRenderer(font, CHAR_WIDTH, CHAR_HEIGHT)
+
+    render_interval = 1 / display_refresh_rate()
+    scheduler = FixedStepScheduler()
+    input_events = deque()
+    pending_keys = deque()  # (模拟时间, 字符)
+    input_task = asyncio.create_task(collect_input(input_events))
+    scheduler.start(time.perf_counter())
+    next_frame = time.perf_counter()
+    skipped = 0
+    step_index = 0
     running = True
 
     # 游戏主循环
     while running:
-        dt = min(0.1, clock.tick(60) / 1000.0)
+        frame_start = time.perf_counter()
+        frame_profiler.begin_frame()
+        steps = scheduler.advance(frame_start)
 
-        # 事件处理
-        for event in pygame.event.get():
+        # 事件处理：按键按到达时间排队，由对应的模拟步处理
+        while input_events:
+            arrival, event = input_events.popleft()
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    frame_profiler.toggle_overlay()  # F3 切换耗时叠加层
+                    continue
                 if game_state['game_over']:
-                    running = False;
+                    running = False
                     continue
-
-                typed_char = event.unicode
-                if typed_char and (typed_char.isalnum() or typed_char in ';.,'):
-                    if game_state['current_target']:
-                        if game_state['current_target'].handle_input(typed_char):
-                            # 单词完成
-                            points = len(game_state['current_target'].text) * 10
-                            game_state['score'] += points * 2 if game_state['current_target'].is_bonus else points
-
-                            # 创建激光
-                            castle_top_grid_y = GRID_HEIGHT - len(castle_art)
-                            core_screen_pos = ((core_position_grid[1] + 0.5) * CHAR_WIDTH,
-                                               (castle_top_grid_y + core_position_grid[0] + 0.5) * CHAR_HEIGHT)
-                            game_state['lasers'].append(
-                                Laser(core_screen_pos, game_state['current_target'].get_center_position()))
-                            game_state['current_target'] = None
-
-                        elif game_state['current_target'].progress == 0:
-                            game_state['current_target'] = None  # 输入错误，取消目标
-
-                    if not game_state['current_target']:
-                        # 寻找新目标
-                        best_match = None
-                        for obj in game_state['falling_objects']:
-                            if obj.active and obj.text.startswith(typed_char.upper()):
-                                if not best_match or obj.pixel_y_float > best_match.pixel_y_float:
-                                    best_match = obj
-                        if best_match:
-                            game_state['current_target'] = best_match
-                            if best_match.handle_input(typed_char):  # 单字母单词
-                                points = len(best_match.text) * 10
-                                game_state['score'] += points
-                                castle_top_grid_y = GRID_HEIGHT - len(castle_art)
-                                core_screen_pos = ((core_position_grid[1] + 0.5) * CHAR_WIDTH,
-                                                   (castle_top_grid_y + core_position_grid[0] + 0.5) * CHAR_HEIGHT)
-                                game_state['lasers'].append(Laser(core_screen_pos, best_match.get_center_position()))
-                                game_state['current_target'] = None
-
-        # 游戏逻辑更新
-        if not game_state['game_over']:
-            # 升级检查
-            old_level = game_state['current_level']
-            level_settings = difficulty_levels[min(len(difficulty_levels) - 1, game_state['current_level'] - 1)]
-            if game_state['score'] >= level_settings['score_threshold']:
-                game_state['current_level'] += 1
-            if game_state['current_level'] > old_level:
-                game_state['level_up_timer'] = time.time()  # 触发升级提示
-
-            # 生成新对象
-            if time.time() - game_state['last_generate_time'] > level_settings['generate_interval']:
-                is_bonus = random.random() < 0.1
-                item_text = random.choice(level_settings['items'])
-                speed = level_settings['speed_grid_per_sec'] * (2.0 if is_bonus else 1.0)
-                game_state['falling_objects'].append(FallingObject(item_text, speed, is_bonus))
-                game_state['last_generate_time'] = time.time()
-
-            # 移动和碰撞检测
-            castle_top_y_px = (GRID_HEIGHT - len(castle_art)) * CHAR_HEIGHT if castle_art else WINDOW_PIXEL_HEIGHT
-            for obj in list(game_state['falling_objects']):
-                if obj.active:
-                    obj.move(dt)
-                    if obj.get_bottom_pixel_y() >= castle_top_y_px:
-                        obj.active = False
-                        if obj == game_state['current_target']:
-                            game_state['current_target'] = None
-
-                        # 城堡伤害
-                        screen_shake.start(magnitude=8, duration=0.3)
-                        pos = obj.get_center_position()
-                        game_state['explosions'].append(Explosion(pos[0], castle_top_y_px, RED))
-
-                        # 简化伤害逻辑：每次命中移除一层
-                        if castle_art:
-                            # 检查核心是否在被摧毁的层
-                            if len(castle_art) - 1 == core_position_grid[0]:
-                                game_state['game_over'] = True
-                            castle_art.pop()
-                        if not castle_art:
-                            game_state['game_over'] = True
-
-            # 清理非活动对象
-            game_state['falling_objects'] = [o for o in game_state['falling_objects'] if o.active]
-            game_state['explosions'] = [e for e in game_state['explosions'] if e.update(dt)]
-            game_state['lasers'] = [l for l in game_state['lasers'] if l.is_active()]
-
-        # 渲染
-        screen.fill(BLACK)
-
-        # 绘制背景和特效
-        digital_rain.draw(screen)
-        offset = screen_shake.get_offset()
-        render_surface = screen.copy()
-
-        # 绘制城堡
-        if not game_state['game_over']:
-            castle_top_grid_y = GRID_HEIGHT - len(castle_art)
-            for i, line in enumerate(castle_art):
-                y = (castle_top_grid_y + i) * CHAR_HEIGHT
-                for j, char in enumerate(line):
-                    if char != ' ':
-                        color = GRAY
-                        if char in '#=': color = BLUE
-                        if char == CORE_CHAR:
-                            # 让核心闪烁
-                            pulse = (math.sin(time.time() * 5) + 1) / 2
-                            color = (
-                                int(PURPLE[0] * (0.5 + pulse * 0.5)),
-                                int(PURPLE[1] * (0.5 + pulse * 0.5)),
-                                int(PURPLE[2] * (0.5 + pulse * 0.5))
-                            )
-                        char_surf = font.render(char, True, color)
-                        render_surface.blit(char_surf, (j * CHAR_WIDTH, y))
-
-        # 绘制游戏对象
-        for obj in game_state['falling_objects']:
-            obj.draw(render_surface, font)
-        for las in game_state['lasers']:
-            las.draw(render_surface)
-        for exp in game_state['explosions']:
-            exp.draw(render_surface)
-
-        # 绘制UI
-        score_text = f"SCORE: {game_state['score']}  LEVEL: {game_state['current_level']}"
-        draw_text_glow(render_surface, score_text, (10, 10), font, WHITE, BLUE)
-        if game_state['current_target']:
-            pygame.draw.rect(render_surface, CYAN_HIGHLIGHT, (game_state['current_target'].pixel_x - 2,
-                                                              int(game_state['current_target'].pixel_y_float) - 2,
-                                                              len(game_state['current_target'].text) * CHAR_WIDTH + 4,
-                                                              CHAR_HEIGHT + 4), 1)
-
-        # 绘制升级提示
-        if game_state['level_up_timer'] and time.time() - game_state['level_up_timer'] < 1.5:
-            alpha = max(0, 255 * (1 - (time.time() - game_state['level_up_timer']) / 1.5))
-            level_up_font = pygame.font.SysFont("Consolas", int(CHAR_HEIGHT * 2.5), bold=True)
-            text_surf = level_up_font.render("LEVEL UP", True, (*YELLOW, alpha))
-            pos = (WINDOW_PIXEL_WIDTH / 2 - text_surf.get_width() / 2,
-                   WINDOW_PIXEL_HEIGHT / 2 - text_surf.get_height() / 2)
-            render_surface.blit(text_surf, pos)
+                pending_keys.append((scheduler.to_sim_time(arrival), event.unicode))
+        frame_profiler.mark('events')
+
+        # 游戏逻辑更新 (固定步长)
+        for _ in range(steps):
+            sim_clock.advance(scheduler.step)
+            step_index += 1
+            while pending_keys and pending_keys[0][0] <= sim_clock.now():
+                arrival, typed_char = pending_keys.popleft()
+                if recorder:
+                    recorder.key(step_index, typed_char, arrival)
+                keystroke(game_state, typed_char, arrival)
+            update(game_state, scheduler.step)
+
+        # 渲染 (模拟已耗尽本帧预算时跳帧)
+        if time.perf_counter() - frame_start > render_interval and skipped < MAX_FRAME_SKIP:
+            skipped += 1
+            scheduler.skipped_frames += 1
         else:
-            game_state['level_up_timer'] = 0
-
-        # 应用屏幕震动
-        screen.blit(render_surface, offset)
-
-        # 游戏结束画面
-        if game_state['game_over']:
-            overlay = pygame.Surface((WINDOW_PIXEL_WIDTH, WINDOW_PIXEL_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            screen.blit(overlay, (0, 0))
-
-            large_font = pygame.font.SysFont("Consolas", CHAR_HEIGHT * 3, bold=True)
-            draw_text_glow(screen, "SYSTEM FAILURE", (WINDOW_PIXEL_WIDTH / 2 - large_font.size("SYSTEM FAILURE")[0] / 2,
-                                                      WINDOW_PIXEL_HEIGHT * 0.3), large_font, RED, RED)
-            draw_text_glow(screen, f"FINAL SCORE: {game_state['score']}",
-                           (WINDOW_PIXEL_WIDTH / 2 - font.size(f"FINAL SCORE: {game_state['score']}")[0] / 2,
-                            WINDOW_PIXEL_HEIGHT * 0.5), font, WHITE, BLUE)
-            draw_text_glow(screen, "Press any key to disconnect...",
-                           (WINDOW_PIXEL_WIDTH / 2 - font.size("Press any key to disconnect...")[0] / 2,
-                            WINDOW_PIXEL_HEIGHT * 0.7), font, GRAY, BLACK)
-
-        pygame.display.flip()
-        await asyncio.sleep(0)
+            skipped = 0
+            draw_game(screen, game_state, digital_rain, castle_renderer, scheduler.alpha)
+            if race_client:
+                race_client.draw_standings(screen)
+            pygame.display.flip()
+            frame_profiler.mark('flip')
+            if app.first_frame_shown() and startup_report:
+                print(app.startup_report())
+        frame_profiler.end_frame()
+
+        # 按绝对时刻排下一帧，sleep 的超时不会逐帧累积；落后超过一帧时重新对齐，不连续补帧
+        next_frame += render_interval
+        now = time.perf_counter()
+        if next_frame < now - render_interval:
+            next_frame = now
+        await asyncio.sleep(max(0.0, next_frame - now))
 
     # 退出Pygame
+    input_task.cancel()
+    if race_client:
+        race_client.close()
+    if recorder:
+        recorder.close(step_index, {'score': game_state['score'], 'level': game_state['current_level'],
+                                    'dropped_time': scheduler.dropped_time,
+                                    'skipped_frames': scheduler.skipped_frames})
+    if game_state['keylog']:
+        game_state['keylog'].close()
+    frame_profiler.close()
     pygame.quit()
     sys.exit()
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Typing Defender")
+    parser.add_argument("--profile", action="store_true", help="启动时显示帧耗时叠加层 (F3 切换)")
+    parser.add_argument("--profile-csv", metavar="PATH", help="将每帧各阶段耗时写入 CSV 文件")
+    parser.add_argument("--corpus", metavar="PATH", help="每行一个单词的词库文件，用于单词关卡")
+    parser.add_argument("--corpus-charset", action="append", choices=sorted(corpus.CHARSET_NAMES),
+                        help="只使用指定字符集的词，可重复指定")
+    parser.add_argument("--keylog", metavar="PATH", help="把每次按键追加记录到二进制日志 (见 keylog.py)")
+    parser.add_argument("--adaptive", action="store_true", help="根据玩家的弱键调整选词和速度")
+    parser.add_argument("--seed", type=int, help="随机种子，默认随机")
+    parser.add_argument("--record", metavar="PATH", help="录制本局会话，可用 replay.py 回放")
+    parser.add_argument("--startup-report", action="store_true", help="首帧显示后打印启动各阶段耗时")
+    parser.add_argument("--race", metavar="HOST:PORT", help="连接竞速服务器 (见 race.py)")
+    parser.add_argument("--name", help="竞速模式中显示的玩家名，默认为主机名")
+    return parser.parse_args(argv)
+
+
+app.phases['packages'] = (_packages_loaded - _module_start) * 1000
+app.phases['import'] = (time.perf_counter() - _packages_loaded) * 1000
+
 if __name__ == "__main__":
     if platform.system() == "Emscripten":
         asyncio.run(run_game())
     else:
         # 在非Web环境中，直接运行
-        asyncio.run(run_game())
+        args = parse_args()
+        if args.corpus:
+            load_corpus(args.corpus, args.corpus_charset)
+        asyncio.run(run_game(profile_csv=args.profile_csv, show_profiler=args.profile, keylog_path=args.keylog,
+                             adaptive_difficulty=args.adaptive, seed=args.seed, record_path=args.record,
+                             startup_report=args.startup_report, race_address=args.race, player_name=args.name))
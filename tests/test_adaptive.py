@@ -0,0 +1,67 @@
+import adaptive
+import batch
+import headless
+import typing_game as tg
+
+
+class GroupCountingTypist(batch.SyntheticTypist):
+    """记录游戏过程中 TargetIndex 的最大分组数和出现过的下落速度"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_groups = 0
+        self.speeds = set()
+
+    def poll(self, game_state, now):
+        buckets = game_state['target_index'].buckets
+        self.max_groups = max(self.max_groups, sum(len(groups) for groups in buckets.values()))
+        self.speeds.update(obj.speed_pixel_per_sec for obj in game_state['falling_objects'])
+        return super().poll(game_state, now)
+
+
+def test_speed_factor_is_quantised():
+    engine = adaptive.AdaptiveEngine(tg.difficulty_levels)
+    for i in range(200):
+        engine.record('FGHJ'[i % 4], i % 3 != 0, i * 0.3)
+    for text in ('F', 'G', 'FJ', 'HELLO', 'ZZZ'):
+        factor = engine.speed_factor(text)
+        assert abs(factor / adaptive.SPEED_STEP - round(factor / adaptive.SPEED_STEP)) < 1e-9
+
+
+def test_target_index_groups_stay_bounded_with_adaptive():
+    # 慢速下落、密集生成、打字较慢：屏幕上同时有数百个对象，且统计在不断变化
+    typist = GroupCountingTypist(wpm=20, error_rate=0.2, seed=3)
+    levels = batch.scaled_levels(speed_scale=0.3, interval_scale=0.1)
+    report = headless.simulate(seed=3, duration=120, adaptive_difficulty=True, typist=typist, levels=levels)
+    assert report['spawned'] > 500
+    # 各关卡的基础速度 x 奖励翻倍 x 0.5..1.3 之间的量化系数
+    steps = round((1.3 - 0.5) / adaptive.SPEED_STEP) + 1
+    assert len(typist.speeds) <= len(tg.difficulty_levels) * 2 * steps
+    # 未量化时每个对象几乎各成一组 (约 400 组)
+    assert typist.max_groups < 150
+
+
+def test_misses_are_charged_to_the_expected_key(tmp_path):
+    import keylog
+
+    tg.app.init_font()
+    tg.set_clock(tg.SimulationClock())
+    game_state = tg.new_game_state()
+    game_state['adaptive'] = engine = adaptive.AdaptiveEngine(tg.difficulty_levels)
+    game_state['keylog'] = keylog.KeystrokeLog(str(tmp_path / 'keys.ttkl'))
+    obj = tg.FallingObject("ATTA", 1.0, object_id=1)
+    game_state['falling_objects'].append(obj)
+    game_state['target_index'].add(obj)
+
+    tg.handle_keystroke(game_state, 'a', 0.0)  # 锁定目标，下一个期望 T
+    for i in range(5):
+        tg.handle_keystroke(game_state, 'r', 0.2 * (i + 1))  # 想按 T 却按了 R
+        game_state['current_target'] = obj  # 保持目标，只看记录在哪个键上
+        obj.progress = 1
+    game_state['keylog'].close()
+
+    assert 'R' not in engine.keys
+    assert engine.keys['T'].accuracy < adaptive.PRIOR_ACCURACY
+    records = next(keylog.iter_chunks(str(tmp_path / 'keys.ttkl')))
+    assert [chr(c) for c in records['char']] == ['A'] + ['T'] * 5
+    assert not (records['flags'][1:] & keylog.FLAG_HIT).any()
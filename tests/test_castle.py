@@ -0,0 +1,48 @@
+import typing_game as tg
+
+
+def new_castle():
+    tg.app.init_font()
+    return tg.Castle(tg.initial_castle_art, tg.core_position_grid)
+
+
+def test_full_castle_survives_direct_hit_over_core():
+    castle = new_castle()
+    core_r, core_c = castle.core
+    assert castle.impact(core_c, core_c)
+    assert not castle.destroyed
+    assert castle.health[castle.core] == castle.max_health[castle.core]
+
+
+def test_core_takes_damage_only_once_exposed():
+    castle = new_castle()
+    core_c = castle.core[1]
+    hits = 0
+    while not castle.destroyed:
+        exposed = castle.core_exposed
+        before = int(castle.health[castle.core])
+        castle.impact(core_c, core_c)
+        if not exposed:
+            assert castle.health[castle.core] == before
+        hits += 1
+        assert hits < 20
+    assert hits >= 3
+
+
+def test_objects_beside_the_castle_land_without_an_impact():
+    castle = new_castle()
+    assert not castle.impact(castle.cols, castle.cols + 2)
+    assert not castle.dirty
+
+    tg.set_clock(tg.SimulationClock())
+    game_state = tg.new_game_state()
+    game_state['last_generate_time'] = float('inf')  # 不生成新对象
+    obj = tg.FallingObject("AB", 10.0, object_id=1)
+    obj.pixel_x = (tg.GRID_WIDTH - 2) * tg.CHAR_WIDTH
+    game_state['falling_objects'].append(obj)
+    for _ in range(600):
+        tg.update_game(game_state, 1 / 60)
+    assert not obj.active
+    assert game_state['stats']['castle_hits'] == 0
+    assert not game_state['explosions']
+    assert not game_state['castle'].damaged_cells()
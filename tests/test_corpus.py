@@ -0,0 +1,30 @@
+import corpus
+
+
+def build(tmp_path, text):
+    path = tmp_path / 'words.txt'
+    path.write_bytes(text)
+    return corpus.WordCorpus(str(path))
+
+
+def test_skipped_long_line_does_not_affect_previous_word(tmp_path):
+    long_space = b'x' * 30 + b' y\n'
+    long_accent = 'é'.encode() * 20 + b'\n'
+    long_code = b'a_' * 20 + b'\n'
+    words = build(tmp_path, b'abc\n' + long_space + b'def\n' + long_accent + b'foo\n' + long_code + b'bar')
+    assert len(words) == 4
+    letters = corpus.CHARSET_LETTERS
+    assert words.bucket_size(6, letters) == 4
+    assert words.bucket_size(6, corpus.CHARSET_CODE) == 0
+    assert sorted(words.word_at(i) for i in range(len(words))) == ['abc', 'bar', 'def', 'foo']
+    words.close()
+
+
+def test_word_classes(tmp_path):
+    words = build(tmp_path, b'cat\r\nab1\nx_y\nno way\n\nlongerword')
+    assert words.bucket_size(6, corpus.CHARSET_LETTERS) == 1
+    assert words.bucket_size(6, corpus.CHARSET_ALNUM) == 1
+    assert words.bucket_size(6, corpus.CHARSET_CODE) == 1
+    assert words.bucket_size(10, corpus.CHARSET_LETTERS) == 1
+    assert len(words) == 4
+    words.close()
@@ -0,0 +1,31 @@
+import json
+import os
+
+import typing_game as tg
+
+
+def test_missing_font_is_looked_up_again_after_fonts_change(tmp_path, monkeypatch):
+    font_dir = tmp_path / 'fonts'
+    font_dir.mkdir()
+    monkeypatch.setattr(tg, 'SYSTEM_FONT_DIRS', [str(font_dir)])
+    lookups = []
+
+    def fake_sysfont(name, size, bold=False, italic=False, constructor=None):
+        lookups.append(name)
+        return constructor(found.get(name), size, bold, italic)
+
+    found = {}
+    monkeypatch.setattr(tg.pygame.font, 'SysFont', fake_sysfont)
+    cache_path = tmp_path / 'fonts.json'
+
+    assert tg.FontPathCache(str(cache_path)).resolve('Consolas') == (None, False)
+    assert tg.FontPathCache(str(cache_path)).resolve('Consolas') == (None, False)
+    assert len(lookups) == 1  # 字体目录没变，沿用缓存
+
+    font_file = font_dir / 'consola.ttf'
+    font_file.write_bytes(b'')
+    signature = json.loads(cache_path.read_text())['Consolas|regular']['fonts']
+    os.utime(font_dir, (signature + 10, signature + 10))  # 安装字体改变了目录的修改时间
+    found['Consolas'] = str(font_file)
+    assert tg.FontPathCache(str(cache_path)).resolve('Consolas') == (str(font_file), False)
+    assert len(lookups) == 2
@@ -0,0 +1,16 @@
+import typing_game as tg
+
+
+def test_keys_after_game_over_are_ignored():
+    tg.app.init_font()
+    tg.set_clock(tg.SimulationClock())
+    game_state = tg.new_game_state()
+    obj = tg.FallingObject("A", 1.0, object_id=1)
+    game_state['falling_objects'].append(obj)
+    game_state['target_index'].add(obj)
+    game_state['game_over'] = True
+
+    tg.handle_keystroke(game_state, 'a')
+    assert game_state['score'] == 0
+    assert obj.active
+    assert game_state['stats']['keystrokes'] == 0
@@ -0,0 +1,58 @@
+import asyncio
+import socket
+
+import race
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_parse_key_rejects_malformed_messages():
+    assert race.parse_key({'k': 'a', 'q': 3}) == (3, 'a')
+    for message in ({'k': 5, 'q': 1}, {'k': 'a'}, {'k': 'ab', 'q': 1}, {'k': '', 'q': 1}, {'k': 'a', 'q': '1'},
+                    {'k': 'a', 'q': True}, ['k', 'a'], 'a', None):
+        assert race.parse_key(message) is None
+
+
+def test_malformed_key_disconnects_sender_and_server_keeps_running():
+    async def scenario():
+        port = free_port()
+        server = race.RaceServer(seed=1)
+        serve_task = asyncio.create_task(server.serve('127.0.0.1', port))
+        await race.wait_for_server('127.0.0.1', port)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(race.encode({'name': 'bad'}))
+        await reader.readline()  # welcome
+        writer.write(race.encode({'k': 5, 'q': 1}))
+        writer.write(race.encode({'k': 'a'}))
+        await writer.drain()
+        # 服务器断开这个连接
+        while await asyncio.wait_for(reader.readline(), 5):
+            pass
+        writer.close()
+
+        # 不是对象的 hello 也被拒绝
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'[1, 2]\n')
+        assert await asyncio.wait_for(reader.readline(), 5) == b''
+        writer.close()
+
+        client = await race.RaceClient.connect('127.0.0.1', port, 'good', effects=False)
+        client.handle_keystroke(client.game_state, 'A')
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            if any('p' in message for message in client.inbox):
+                break
+        stats = await race.fetch_stats('127.0.0.1', port)
+        client.close()
+        await asyncio.sleep(0.05)
+        assert not serve_task.done()
+        serve_task.cancel()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats['keys_processed'] == 1
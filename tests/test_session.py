@@ -0,0 +1,14 @@
+import session
+
+
+def test_key_arrival_times_round_trip_exactly(tmp_path):
+    path = str(tmp_path / 'session.jsonl')
+    arrivals = [0.1 + 0.2, 1 / 3, 12.345678901234567, 1e-9]
+    recorder = session.SessionRecorder(path, seed=7, step=1 / 120)
+    for i, arrival in enumerate(arrivals):
+        recorder.key(i + 1, 'A', arrival)
+    recorder.close(len(arrivals))
+
+    loaded = session.load_session(path)
+    assert [key[2] for key in loaded.keys] == arrivals
+    assert loaded.step == 1 / 120